@@ -1,17 +1,27 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 from app.core.config import settings
-from app.db.database import get_db
+from app.db.database import get_async_read_db
 from app.models.user import User
+from app.schemas.user import CurrentUser
+from app.utils.cache import TTLCache
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+# Per-worker caches so authenticated requests skip JWT decoding and the user lookup.
+# Tokens are keyed by their SHA-256, so raw tokens are never held as keys.
+token_cache = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES, name="auth_token")
+user_cache = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES, name="auth_user")
+
 # JWT token functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -34,8 +44,12 @@ def verify_token(token: str):
     except JWTError:
         return None
 
+def invalidate_user(user_id):
+    """Drop a user's cached snapshot after their details or active status change"""
+    user_cache.pop(str(user_id))
+
 # User authentication dependencies
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)):
     """Get the current authenticated user from token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,24 +57,38 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Verify token
-    payload = verify_token(token)
+    # Verify token, unless it was decoded recently
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(token_key)
     if payload is None:
-        raise credentials_exception
+        payload = verify_token(token)
+        if payload is None:
+            raise credentials_exception
+        # Never cache a token past its expiry
+        token_cache.set(token_key, payload, payload.get("exp", 0) - time.time())
     
     # Get user ID from token
     user_id = payload.get("sub")
     if user_id is None:
         raise credentials_exception
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    # Get user from cache or database
+    user = user_cache.get(str(user_id))
     if user is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        db_user = result.scalar_one_or_none()
+        if db_user is None:
+            raise credentials_exception
+        user = CurrentUser.model_validate(db_user)
+        user_cache.set(str(user_id), user)
+    
+    # A deactivated account's tokens stop working, cached snapshot or not
+    if not user.is_active:
         raise credentials_exception
     
     return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)):
     """Check if the current user is active"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
+from app.db.partitions import transaction_source
 from app.models.category import Category
 from app.models.category_keyword import CategoryKeyword
 from app.schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate, KeywordCreate
 from app.api.dependencies.auth import get_current_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 
 router = APIRouter()
 
@@ -15,11 +17,12 @@ router = APIRouter()
 def get_categories(
     type: Optional[str] = None,  # 'expense' or 'income'
     parent_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get all categories for the current user, including system categories"""
-    query = db.query(Category).filter(
+    # Load every category's keywords in one extra query instead of one per category
+    query = db.query(Category).options(selectinload(Category.keywords)).filter(
         (Category.user_id == current_user.id) | (Category.is_system == True)
     )
     
@@ -41,11 +44,11 @@ def get_categories(
 @router.get("/{category_id}", response_model=CategoryResponse)
 def get_category(
     category_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific category by ID"""
-    category = db.query(Category).filter(
+    category = db.query(Category).options(selectinload(Category.keywords)).filter(
         Category.id == category_id,
         ((Category.user_id == current_user.id) | (Category.is_system == True))
     ).first()
@@ -61,7 +64,7 @@ def get_category(
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(
     category: CategoryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new category"""
@@ -98,7 +101,7 @@ def create_category(
 def update_category(
     category_id: int,
     category: CategoryUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update a category"""
@@ -132,7 +135,7 @@ def update_category(
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_category(
     category_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a category"""
@@ -154,15 +157,16 @@ def delete_category(
             detail="System categories cannot be deleted"
         )
     
-    # Check if category has transactions - if so, don't allow deletion
-    if db_category.transactions:
+    # Check if category has transactions (archived years included) - if so, don't allow deletion
+    source = transaction_source(db)
+    if db.query(exists().where(source.category_id == category_id)).scalar():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete category that has transactions. Reassign transactions first."
         )
     
     # Check if category has children - if so, don't allow deletion
-    if db_category.children:
+    if db.query(exists().where(Category.parent_id == category_id)).scalar():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete category that has subcategories. Delete subcategories first."
@@ -177,7 +181,7 @@ def delete_category(
 def add_category_keyword(
     category_id: int,
     keyword: KeywordCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Add a keyword for auto-categorization"""
@@ -224,7 +228,7 @@ def add_category_keyword(
 def delete_category_keyword(
     category_id: int,
     keyword_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a category keyword"""
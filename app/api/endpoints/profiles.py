@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from typing import List
+
+from app.core.request_profiler import list_profiles, profile_file
+
+# Only mounted in DEBUG (see main.py)
+router = APIRouter()
+
+@router.get("/", response_model=List[dict])
+def get_profiles():
+    """List saved request profiles, newest first"""
+    return list_profiles()
+
+@router.get("/{profile_id}")
+def download_profile(profile_id: str):
+    """Download a profile's folded stacks (flamegraph.pl / speedscope format)"""
+    path = profile_file(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -1,24 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, extract, select
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.db.database import get_db
-from app.models.transaction import Transaction
+from app.core.config import settings
+from app.db.database import get_async_read_db
+from app.db.partitions import transaction_source
 from app.models.category import Category
 from app.schemas.transaction import TransactionAnalytics
+from app.utils.money import minor_to_float
+from app.utils.serialization import NEGOTIATED_RESPONSES, negotiated_response
 from app.api.dependencies.auth import get_current_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 
 router = APIRouter()
 
-@router.get("/summary", response_model=TransactionAnalytics)
-def get_transaction_summary(
+async def report_currency(db: AsyncSession, source, conditions, currency: Optional[str]) -> str:
+    """The one currency a report covers: the requested one, or the only one its rows use
+
+    Minor units of different currencies can't be summed, so a range holding
+    several is refused until the caller picks one.
+    """
+    if currency:
+        return currency.upper()
+    result = await db.execute(select(source.currency).filter(*conditions).distinct())
+    currencies = sorted(result.scalars())
+    if len(currencies) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Transactions in this range use several currencies ({', '.join(currencies)}); "
+                   "choose one with the currency parameter"
+        )
+    return currencies[0] if currencies else settings.DEFAULT_CURRENCY
+
+@router.get("/summary", response_model=TransactionAnalytics, responses=NEGOTIATED_RESPONSES)
+async def get_transaction_summary(
+    request: Request,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    currency: Optional[str] = Query(None, description="ISO 4217 code; required when the range holds several currencies"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get a summary of transactions with analytics"""
     # Set default date range if not provided (last 30 days)
@@ -32,118 +55,135 @@ def get_transaction_summary(
     else:
         start_date = datetime.fromisoformat(start_date)
     
-    # Get all transactions in the date range
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.transaction_date >= start_date,
-        Transaction.transaction_date <= end_date
-    ).all()
-    
-    # Calculate totals
-    total_expense = sum(tx.amount for tx in transactions if tx.is_expense)
-    total_income = sum(tx.amount for tx in transactions if not tx.is_expense)
-    net_cashflow = total_income - total_expense
-    
-    # Get top expense categories
-    expense_by_category = {}
-    for tx in transactions:
-        if tx.is_expense and tx.category_id:
-            category_id = tx.category_id
-            if category_id not in expense_by_category:
-                expense_by_category[category_id] = 0
-            expense_by_category[category_id] += tx.amount
-    
-    # Get category names
-    category_ids = list(expense_by_category.keys())
-    categories = {
-        cat.id: cat.name 
-        for cat in db.query(Category).filter(Category.id.in_(category_ids)).all()
-    }
+    # Only scan the partitions that overlap the range
+    source = await db.run_sync(transaction_source, start_date, end_date)
     
-    # Format expense by category
-    top_expense_categories = [
-        {"category_id": cat_id, "category_name": categories.get(cat_id, "Uncategorized"), "amount": amount}
-        for cat_id, amount in sorted(expense_by_category.items(), key=lambda x: x[1], reverse=True)[:5]
-    ]
+    # Rows reconciled into another (the same payment from a second statement) count once
+    in_range = (
+        source.user_id == current_user.id,
+        source.reconciled_with_id == None,
+        source.transaction_date >= start_date,
+        source.transaction_date <= end_date
+    )
+    currency = await report_currency(db, source, in_range, currency)
+    in_range += (source.currency == currency,)
     
-    # Get top income categories
-    income_by_category = {}
-    for tx in transactions:
-        if not tx.is_expense and tx.category_id:
-            category_id = tx.category_id
-            if category_id not in income_by_category:
-                income_by_category[category_id] = 0
-            income_by_category[category_id] += tx.amount
+    # Totals, summed in SQL over integer minor units so they are exact
+    result = await db.execute(
+        select(
+            source.is_expense,
+            func.sum(source.amount_minor).label("total_minor"),
+            func.count(source.id).label("transaction_count")
+        ).filter(*in_range).group_by(source.is_expense)
+    )
+    totals = {row.is_expense: row for row in result}
+    total_expense = minor_to_float(totals[True].total_minor, currency) if True in totals else 0.0
+    total_income = minor_to_float(totals[False].total_minor, currency) if False in totals else 0.0
+    net_cashflow = minor_to_float(
+        (totals[False].total_minor if False in totals else 0) - (totals[True].total_minor if True in totals else 0),
+        currency
+    )
+    transaction_count = sum(row.transaction_count for row in totals.values())
     
-    # Format income by category
-    top_income_categories = [
-        {"category_id": cat_id, "category_name": categories.get(cat_id, "Uncategorized"), "amount": amount}
-        for cat_id, amount in sorted(income_by_category.items(), key=lambda x: x[1], reverse=True)[:5]
-    ]
+    # Per-category totals for the top expense and income categories
+    result = await db.execute(
+        select(
+            source.is_expense,
+            source.category_id,
+            Category.name.label("category_name"),
+            func.sum(source.amount_minor).label("total_minor")
+        ).join(
+            Category, source.category_id == Category.id, isouter=True
+        ).filter(
+            *in_range, source.category_id != None
+        ).group_by(
+            source.is_expense, source.category_id, Category.name
+        ).order_by(func.sum(source.amount_minor).desc())
+    )
+    top_expense_categories = []
+    top_income_categories = []
+    for row in result:
+        top = top_expense_categories if row.is_expense else top_income_categories
+        if len(top) < 5:
+            top.append({
+                "category_id": row.category_id,
+                "category_name": row.category_name or "Uncategorized",
+                "amount": minor_to_float(row.total_minor, currency)
+            })
     
     # Calculate monthly breakdown
-    monthly_breakdown = []
-    for tx in transactions:
-        month = tx.transaction_date.strftime("%Y-%m")
-        month_entry = next((m for m in monthly_breakdown if m["month"] == month), None)
-        
-        if not month_entry:
-            month_entry = {
-                "month": month, 
-                "expense": 0, 
-                "income": 0,
-                "net": 0
-            }
-            monthly_breakdown.append(month_entry)
-        
-        if tx.is_expense:
-            month_entry["expense"] += tx.amount
-        else:
-            month_entry["income"] += tx.amount
-        
-        month_entry["net"] = month_entry["income"] - month_entry["expense"]
+    result = await db.execute(
+        select(
+            extract('year', source.transaction_date).label("year"),
+            extract('month', source.transaction_date).label("month"),
+            source.is_expense,
+            func.sum(source.amount_minor).label("total_minor")
+        ).filter(*in_range).group_by("year", "month", source.is_expense)
+    )
+    monthly_minor = {}
+    for row in result:
+        month_entry = monthly_minor.setdefault(f"{int(row.year):04d}-{int(row.month):02d}", {"expense": 0, "income": 0})
+        month_entry["expense" if row.is_expense else "income"] += row.total_minor
     
-    # Sort by month
-    monthly_breakdown.sort(key=lambda x: x["month"])
+    monthly_breakdown = [
+        {
+            "month": month,
+            "expense": minor_to_float(entry["expense"], currency),
+            "income": minor_to_float(entry["income"], currency),
+            "net": minor_to_float(entry["income"] - entry["expense"], currency)
+        }
+        for month, entry in sorted(monthly_minor.items())
+    ]
     
-    return {
+    return negotiated_response(request, {
+        "currency": currency,
         "total_expense": total_expense,
         "total_income": total_income,
         "net_cashflow": net_cashflow,
-        "transaction_count": len(transactions),
+        "transaction_count": transaction_count,
         "top_expense_categories": top_expense_categories,
         "top_income_categories": top_income_categories,
         "monthly_breakdown": monthly_breakdown
-    }
+    })
 
-@router.get("/monthly")
-def get_monthly_report(
+@router.get("/monthly", responses=NEGOTIATED_RESPONSES)
+async def get_monthly_report(
+    request: Request,
     year: int = Query(..., description="Year for the report"),
     month: Optional[int] = Query(None, description="Month for the report (1-12)"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    currency: Optional[str] = Query(None, description="ISO 4217 code; required when the range holds several currencies"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get a detailed monthly report"""
-    query = db.query(
-        Transaction.category_id,
-        Category.name.label("category_name"),
-        func.sum(Transaction.amount).label("total_amount"),
-        func.count(Transaction.id).label("transaction_count")
-    ).join(
-        Category, Transaction.category_id == Category.id, isouter=True
-    ).filter(
-        Transaction.user_id == current_user.id,
-        extract('year', Transaction.transaction_date) == year
-    )
+    # Only scan the partition(s) for the requested year
+    source = await db.run_sync(transaction_source, datetime(year, 1, 1), datetime(year, 12, 31, 23, 59, 59))
     
+    in_period = [
+        source.user_id == current_user.id,
+        source.reconciled_with_id == None,
+        extract('year', source.transaction_date) == year
+    ]
     if month:
-        query = query.filter(extract('month', Transaction.transaction_date) == month)
+        in_period.append(extract('month', source.transaction_date) == month)
+    currency = await report_currency(db, source, in_period, currency)
+    in_period.append(source.currency == currency)
+    
+    query = select(
+        source.category_id,
+        Category.name.label("category_name"),
+        func.sum(source.amount_minor).label("total_minor"),
+        func.count(source.id).label("transaction_count")
+    ).join(
+        Category, source.category_id == Category.id, isouter=True
+    ).filter(*in_period)
     
     # Group by category
-    result = query.group_by(
-        Transaction.category_id,
+    query = query.group_by(
+        source.category_id,
         Category.name
-    ).order_by(func.sum(Transaction.amount).desc()).all()
+    ).order_by(func.sum(source.amount_minor).desc())
+    result = (await db.execute(query)).all()
     
     # Format the result
     categories = []
@@ -151,46 +191,36 @@ def get_monthly_report(
         categories.append({
             "category_id": row.category_id,
             "category_name": row.category_name or "Uncategorized",
-            "total_amount": row.total_amount,
+            "total_amount": minor_to_float(row.total_minor, currency),
             "transaction_count": row.transaction_count
         })
     
     # Get total expense and income
-    expenses = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        extract('year', Transaction.transaction_date) == year,
-        Transaction.is_expense == True
-    )
-    
-    income = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        extract('year', Transaction.transaction_date) == year,
-        Transaction.is_expense == False
-    )
-    
-    if month:
-        expenses = expenses.filter(extract('month', Transaction.transaction_date) == month)
-        income = income.filter(extract('month', Transaction.transaction_date) == month)
+    expenses = select(func.sum(source.amount_minor)).filter(*in_period, source.is_expense == True)
+    income = select(func.sum(source.amount_minor)).filter(*in_period, source.is_expense == False)
     
-    total_expense = expenses.scalar() or 0
-    total_income = income.scalar() or 0
+    total_expense = (await db.execute(expenses)).scalar() or 0
+    total_income = (await db.execute(income)).scalar() or 0
     
-    return {
+    return negotiated_response(request, {
         "year": year,
         "month": month,
-        "total_expense": total_expense,
-        "total_income": total_income,
-        "net": total_income - total_expense,
+        "currency": currency,
+        "total_expense": minor_to_float(total_expense, currency),
+        "total_income": minor_to_float(total_income, currency),
+        "net": minor_to_float(total_income - total_expense, currency),
         "categories": categories
-    }
+    })
 
-@router.get("/category-comparison")
-def get_category_comparison(
+@router.get("/category-comparison", responses=NEGOTIATED_RESPONSES)
+async def get_category_comparison(
+    request: Request,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     category_ids: List[int] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    currency: Optional[str] = Query(None, description="ISO 4217 code; required when the range holds several currencies"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Compare spending across different categories over time"""
     # Set default date range if not provided (last 90 days)
@@ -204,53 +234,57 @@ def get_category_comparison(
     else:
         start_date = datetime.fromisoformat(start_date)
     
-    # Base query for transactions in the date range
-    query = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.transaction_date >= start_date,
-        Transaction.transaction_date <= end_date
-    )
+    # Only scan the partitions that overlap the range
+    source = await db.run_sync(transaction_source, start_date, end_date)
+    
+    in_range = [
+        source.user_id == current_user.id,
+        source.reconciled_with_id == None,
+        source.transaction_date >= start_date,
+        source.transaction_date <= end_date
+    ]
     
     # If category IDs are provided, filter by them
     if category_ids:
-        query = query.filter(Transaction.category_id.in_(category_ids))
+        in_range.append(source.category_id.in_(category_ids))
+    currency = await report_currency(db, source, in_range, currency)
+    in_range.append(source.currency == currency)
     
-    transactions = query.all()
+    # Monthly totals per category, summed in SQL over integer minor units
+    query = select(
+        extract('year', source.transaction_date).label("year"),
+        extract('month', source.transaction_date).label("month"),
+        source.category_id,
+        Category.name.label("category_name"),
+        func.sum(source.amount_minor).label("total_minor")
+    ).join(
+        Category, source.category_id == Category.id, isouter=True
+    ).filter(*in_range)
     
-    # Get all relevant categories
-    category_ids_used = set(tx.category_id for tx in transactions if tx.category_id)
-    categories = {
-        cat.id: cat.name 
-        for cat in db.query(Category).filter(Category.id.in_(category_ids_used)).all()
-    }
+    query = query.group_by("year", "month", source.category_id, Category.name)
     
     # Organize data by month and category
     monthly_data = {}
-    for tx in transactions:
-        month = tx.transaction_date.strftime("%Y-%m")
-        category_id = tx.category_id or 0  # Use 0 for uncategorized
-        
-        if month not in monthly_data:
-            monthly_data[month] = {}
-        
-        if category_id not in monthly_data[month]:
-            monthly_data[month][category_id] = 0
+    for row in await db.execute(query):
+        month = f"{int(row.year):04d}-{int(row.month):02d}"
+        cat_name = row.category_name or "Uncategorized"
         
-        monthly_data[month][category_id] += tx.amount
+        month_data = monthly_data.setdefault(month, {})
+        month_data[cat_name] = month_data.get(cat_name, 0) + row.total_minor
     
     # Format the result
     result = []
     for month, categories_data in sorted(monthly_data.items()):
         month_data = {"month": month}
         
-        for cat_id, amount in categories_data.items():
-            cat_name = categories.get(cat_id, "Uncategorized")
-            month_data[cat_name] = amount
+        for cat_name, total_minor in categories_data.items():
+            month_data[cat_name] = minor_to_float(total_minor, currency)
         
         result.append(month_data)
     
-    return {
+    return negotiated_response(request, {
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
+        "currency": currency,
         "monthly_data": result
-    } 
\ No newline at end of file
+    })
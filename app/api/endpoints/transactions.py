@@ -1,106 +1,211 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.db.database import get_db
+from app.core.config import settings
+from app.db.database import engine, get_db, get_read_db, get_async_db, get_async_read_db
+from app.db.partitions import archive_table, archive_years, partition_tables, transaction_source
+from app.db.search_index import build_match_query, search_match
+from app.models.category import Category
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionUpdate
+from app.schemas.transaction import (
+    BulkOperationResponse, BulkTransactionDelete, BulkTransactionUpdate, ReconciliationResponse,
+    TransactionCreate, TransactionResponse, TransactionUpdate
+)
+from app.services.ingest import ingest_coordinator, transaction_insert_rows
 from app.services.transaction_parser import TransactionParser
+from app.services.reconciliation import reconcile
+from app.services.import_manifest import find_import, parse_with_cache, record_import
+from app.services.upload_store import content_hash, store_upload
+from app.utils.serialization import (
+    NEGOTIATED_RESPONSES, TRANSACTION_FIELDS, negotiated_response, transaction_columns, transaction_rows
+)
 from app.api.dependencies.auth import get_current_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 
 router = APIRouter()
 
+# Ids per statement in bulk operations, well under SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
 async def upload_transactions(
     file: UploadFile = File(...),
     bank_type: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    force: bool = Form(False),  # import again even if this exact file was imported before
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a bank transaction file and parse transactions"""
     transaction_parser = TransactionParser()
     
     try:
-        # Save the uploaded file
-        file_path = await transaction_parser.save_upload_file(file)
+        file_extension = transaction_parser.file_extension(file.filename)
+        content = await file.read()
+        sha256 = await run_in_threadpool(content_hash, content)
         
-        # Parse the file
-        transactions = transaction_parser.parse_file(file_path, bank_type)
+        # The same bytes imported before with this parser: report that import instead
+        previous = None if force else await find_import(db, current_user.id, sha256, bank_type)
+        if previous is not None:
+            return JSONResponse(status_code=status.HTTP_200_OK, content={
+                "message": f"This file was already imported on {previous.created_at:%Y-%m-%d %H:%M}",
+                "file_name": file.filename,
+                "transaction_count": previous.transaction_count,
+                "import_id": previous.id,
+                "imported_at": previous.created_at.isoformat(),
+                "duplicate": True
+            })
         
-        # Save transactions to database
-        db_transactions = []
-        for tx_data in transactions:
-            db_tx = Transaction(
-                user_id=current_user.id,
-                transaction_date=tx_data["transaction_date"],
-                amount=tx_data["amount"],
-                description=tx_data["description"],
-                merchant=tx_data["merchant"],
-                is_expense=tx_data["is_expense"],
-                source_file=file.filename
-            )
-            db.add(db_tx)
-            db_transactions.append(db_tx)
+        # Keep the statement in the content-addressed store, once per distinct file
+        upload = await store_upload(db, current_user.id, file.filename, content, sha256)
+        
+        # Parse the file off the event loop, it is CPU bound; identical content
+        # parsed before (by anyone) comes from the parse cache
+        transactions, _ = await run_in_threadpool(
+            parse_with_cache, transaction_parser, content, file_extension, sha256, bank_type
+        )
         
-        db.commit()
+        # Save transactions through the single writer, which batches them with
+        # concurrent uploads from this worker and serializes with other workers.
+        # Rows the user already has from an overlapping statement are skipped.
+        rows = transaction_insert_rows(current_user.id, transactions, file.filename, upload.id)
+        transaction_count = await ingest_coordinator.ingest(rows)
+        import_id = await record_import(db, current_user.id, sha256, bank_type, upload.id, transaction_count)
         
         return {
-            "message": f"Successfully uploaded and processed {len(db_transactions)} transactions",
+            "message": f"Successfully uploaded and processed {transaction_count} transactions",
             "file_name": file.filename,
-            "transaction_count": len(db_transactions)
+            "transaction_count": transaction_count,
+            "duplicates_skipped": len(rows) - transaction_count,
+            "import_id": import_id,
+            "duplicate": False
         }
     
     except Exception as e:
-        # Rollback in case of error
-        db.rollback()
+        # The writer rolls back a failed batch on its own
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.get("/", response_model=List[TransactionResponse])
-def get_transactions(
+@router.get("/", response_model=List[TransactionResponse], responses=NEGOTIATED_RESPONSES)
+async def get_transactions(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     category_id: Optional[int] = None,
     is_expense: Optional[bool] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get user transactions with optional filtering"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    # Date-bounded listings only read the archive years they overlap
+    source = await db.run_sync(transaction_source, start_date, end_date)
+    # Select just the response columns; no ORM objects are built for a listing
+    query = select(*transaction_columns(source)).filter(source.user_id == current_user.id)
     
     # Apply filters if provided
-    if start_date:
-        query = query.filter(Transaction.transaction_date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.transaction_date <= end_date)
-    if category_id is not None:
-        query = query.filter(Transaction.category_id == category_id)
-    if is_expense is not None:
-        query = query.filter(Transaction.is_expense == is_expense)
+    query = _apply_filters(query, start_date, end_date, category_id, is_expense, source)
     
     # Order by date (most recent first)
-    query = query.order_by(Transaction.transaction_date.desc())
+    query = query.order_by(source.transaction_date.desc())
     
     # Apply pagination
-    transactions = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    
+    return negotiated_response(request, transaction_rows(result), TRANSACTION_FIELDS)
+
+@router.get("/search", response_model=List[TransactionResponse], responses=NEGOTIATED_RESPONSES)
+async def search_transactions(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Words or word prefixes to match in description and merchant"),
+    skip: int = 0,
+    limit: int = 100,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category_id: Optional[int] = None,
+    is_expense: Optional[bool] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Full-text search over transaction descriptions and merchants, best matches first"""
+    match_query = build_match_query(q)
+    if match_query is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one letter or digit"
+        )
+    
+    # Archived years are searched through their own indexes, like listings read them
+    source = await db.run_sync(transaction_source, start_date, end_date)
+    match = search_match(match_query, await db.run_sync(partition_tables, start_date, end_date))
+    query = select(*transaction_columns(source)).join(
+        match, match.c.rowid == source.id
+    ).filter(source.user_id == current_user.id)
+    
+    query = _apply_filters(query, start_date, end_date, category_id, is_expense, source)
+    
+    # Rank by relevance, then most recent first among equally ranked rows
+    query = query.order_by(match.c.rank, source.transaction_date.desc())
+    
+    result = await db.execute(query.offset(skip).limit(limit))
+    
+    return negotiated_response(request, transaction_rows(result), TRANSACTION_FIELDS)
+
+@router.get("/export", response_model=List[TransactionResponse], responses=NEGOTIATED_RESPONSES)
+async def export_transactions(
+    request: Request,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category_id: Optional[int] = None,
+    is_expense: Optional[bool] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Export every matching transaction in one response, most recent first"""
+    source = await db.run_sync(transaction_source, start_date, end_date)
+    query = select(*transaction_columns(source)).filter(source.user_id == current_user.id)
+    query = _apply_filters(query, start_date, end_date, category_id, is_expense, source)
     
-    return transactions
+    result = await db.execute(query.order_by(source.transaction_date.desc()))
+    
+    # An export can run to the user's whole history; building, encoding and
+    # gzipping it on the event loop would stall every other request meanwhile
+    return await run_in_threadpool(
+        lambda: negotiated_response(request, transaction_rows(result), TRANSACTION_FIELDS)
+    )
+
+@router.post("/reconcile", response_model=ReconciliationResponse)
+def reconcile_transactions(
+    window_days: int = Query(settings.RECONCILE_WINDOW_DAYS, ge=0, le=31),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Link payments imported from two statements (e.g. bank and PhonePe) so each counts once
+
+    Pairs are matched by UTR, otherwise by amount within window_days. The row
+    with the richer description is kept; the other is hidden from listings
+    and reports.
+    """
+    return reconcile(engine, current_user.id, window_days)
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
     transaction_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific transaction by ID"""
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
+    # Look in archived years too
+    source = transaction_source(db)
+    transaction = db.query(source).filter(
+        source.id == transaction_id,
+        source.user_id == current_user.id
     ).first()
     
     if not transaction:
@@ -115,7 +220,7 @@ def get_transaction(
 def update_transaction(
     transaction_id: int,
     transaction: TransactionUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update a transaction"""
@@ -142,7 +247,7 @@ def update_transaction(
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_transaction(
     transaction_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a transaction"""
@@ -157,7 +262,122 @@ def delete_transaction(
             detail="Transaction not found"
         )
     
+    # Rows reconciled into this one are the only record of the payment left
+    db.query(Transaction).filter(Transaction.reconciled_with_id == transaction_id).update(
+        {"reconciled_with_id": None}, synchronize_session=False
+    )
     db.delete(db_transaction)
     db.commit()
     
-    return None 
\ No newline at end of file
+    return None
+
+@router.post("/bulk-delete", response_model=BulkOperationResponse)
+def bulk_delete_transactions(
+    selection: BulkTransactionDelete,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete many transactions by ID and/or source file in one transaction
+
+    Archived years are included, so deleting by source_file removes the whole import.
+    """
+    if not selection.transaction_ids and not selection.source_file:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide transaction_ids or source_file"
+        )
+    
+    tables = [Transaction.__table__] + [archive_table(year) for year in archive_years(db)]
+    chunks = list(_chunks(selection.transaction_ids)) if selection.transaction_ids else [None]
+    
+    affected = 0
+    for table in tables:
+        conditions = [table.c.user_id == current_user.id]
+        if selection.source_file:
+            conditions.append(table.c.source_file == selection.source_file)
+        for chunk in chunks:
+            selected = conditions + ([table.c.id.in_(chunk)] if chunk is not None else [])
+            _release_reconciled(db, select(table.c.id).where(*selected), tables)
+            affected += db.execute(delete(table).where(*selected)).rowcount
+    
+    db.commit()
+    
+    return {"affected": affected}
+
+@router.patch("/bulk", response_model=BulkOperationResponse)
+def bulk_update_transactions(
+    changes: BulkTransactionUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply the same field values to many transactions in one transaction"""
+    values = changes.dict(exclude_unset=True, exclude={"transaction_ids"})
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    
+    # The target category must be visible to the user
+    if values.get("category_id") is not None:
+        category_visible = db.query(exists().where(
+            Category.id == values["category_id"],
+            (Category.user_id == current_user.id) | (Category.is_system == True)
+        )).scalar()
+        if not category_visible:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found"
+            )
+    
+    affected = 0
+    for chunk in _chunks(changes.transaction_ids):
+        result = db.execute(
+            update(Transaction).where(
+                Transaction.user_id == current_user.id,
+                Transaction.id.in_(chunk)
+            ).values(**values),
+            execution_options={"synchronize_session": False}
+        )
+        affected += result.rowcount
+    
+    db.commit()
+    
+    return {"affected": affected}
+
+def _release_reconciled(db: Session, deleted_ids, tables=(Transaction.__table__,)):
+    """Unhide rows reconciled into transactions about to be deleted; they become the payment's record"""
+    for table in tables:
+        db.execute(
+            update(table).where(table.c.reconciled_with_id.in_(deleted_ids)).values(reconciled_with_id=None)
+        )
+
+def _chunks(ids: List[int], size: int = BULK_CHUNK_SIZE):
+    """Split a list of IDs into de-duplicated chunks for IN (...) clauses"""
+    unique_ids = list(dict.fromkeys(ids))
+    for start in range(0, len(unique_ids), size):
+        yield unique_ids[start:start + size]
+
+def _apply_filters(
+    query,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category_id: Optional[int] = None,
+    is_expense: Optional[bool] = None,
+    source=Transaction
+):
+    """Apply the common date, category and expense filters to a transaction query or select
+
+    `source` is the entity being queried, Transaction or a partition alias.
+    Rows reconciled into another transaction are always left out.
+    """
+    query = query.filter(source.reconciled_with_id == None)
+    if start_date:
+        query = query.filter(source.transaction_date >= start_date)
+    if end_date:
+        query = query.filter(source.transaction_date <= end_date)
+    if category_id is not None:
+        query = query.filter(source.category_id == category_id)
+    if is_expense is not None:
+        query = query.filter(source.is_expense == is_expense)
+    return query
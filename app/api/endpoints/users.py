@@ -1,23 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from typing import Optional, List
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db, get_async_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token, UserUpdate
-from app.api.dependencies.auth import get_current_user, create_access_token
+from app.schemas.user import CurrentUser, UserCreate, UserResponse, Token, UserUpdate
+from app.api.dependencies.auth import get_current_user, create_access_token, invalidate_user
 from app.core.config import settings
-from app.utils.security import get_password_hash, verify_password
+from app.utils.security import get_password_hash_async, verify_password_async
 
 router = APIRouter()
 
 # Development-only endpoint to list users
 @router.get("/list", response_model=List[UserResponse])
 def list_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """List all users (development only)"""
     if not settings.DEBUG:
@@ -28,18 +30,18 @@ def list_users(
     return db.query(User).all()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user with this email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    result = await db.execute(select(User).where(User.email == user.email))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         full_name=user.full_name,
@@ -47,19 +49,19 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """OAuth2 compatible token login, get an access token for future requests"""
     # Authenticate user
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,44 +78,68 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(current_user: CurrentUser = Depends(get_current_user)):
     """Get current user"""
     return current_user
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     user: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user"""
     # Check if trying to change email to an existing one
     if user.email and user.email != current_user.email:
-        db_user = db.query(User).filter(User.email == user.email).first()
-        if db_user:
+        result = await db.execute(select(User).where(User.email == user.email))
+        if result.scalars().first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
     
+    # current_user is a cached snapshot, so edit the row through this session
+    db_user = await db.get(User, current_user.id)
+    
     # Update user details
     for key, value in user.dict(exclude_unset=True, exclude={"password"}).items():
-        setattr(current_user, key, value)
+        setattr(db_user, key, value)
     
     # Update password if provided
     if user.password:
-        current_user.hashed_password = get_password_hash(user.password)
+        db_user.hashed_password = await get_password_hash_async(user.password)
+    
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_user(db_user.id)
+    
+    return db_user
+
+@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+def deactivate_user_me(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Deactivate the current user's account"""
+    db_user = db.query(User).filter(User.id == current_user.id).first()
+    db_user.is_active = False
     
     db.commit()
-    db.refresh(current_user)
+    invalidate_user(db_user.id)
     
-    return current_user
+    return None
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user by email and password"""
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if not user or not user.is_active:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_password_async(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Stored hash uses an old bcrypt cost; upgrade it now that we have the password
+        user.hashed_password = new_hash
+        await db.commit()
     return user 
\ No newline at end of file
@@ -10,13 +10,74 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-development")
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    # Derived from DATABASE_URL (sqlite -> sqlite+aiosqlite) when left empty
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Used by report and list endpoints; a read-only (mode=ro) view of DATABASE_URL when empty
+    READ_DATABASE_URL: str = os.getenv("READ_DATABASE_URL", "")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Decoded tokens and user snapshots are cached per worker. Changes made
+    # through another worker show up here within this many seconds.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Password hashing. Changing BCRYPT_ROUNDS rehashes each password on its next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # per worker process
+    PASSWORD_HASH_QUEUE_LIMIT: int = 16  # waiting jobs beyond this get a 503
+    DEFAULT_CURRENCY: str = "INR"  # ISO 4217 code for amounts that don't state one
     DEBUG: bool = os.getenv("DEBUG", "True").lower() in ("true", "1", "t")
+    LOG_LEVEL: str = "INFO"
+    
+    # Per-request SQL profiling: Server-Timing headers, a log line per request and
+    # N+1 warnings. On by default in DEBUG.
+    SQL_PROFILING: bool = DEBUG
+    SQL_PROFILE_SLOWEST: int = 3  # slowest statements logged per request
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10  # warn when one statement shape runs more often than this
+    
+    # On-demand request profiling: requests with an X-Profile header (a signed token
+    # from scripts/profile_token.py outside DEBUG) are sampled into PROFILE_DIR
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", os.path.join("storage", "profiles"))
+    PROFILE_MAX_FILES: int = 50  # oldest profiles are deleted beyond this
+    PROFILE_SAMPLE_INTERVAL_MS: int = 5
+    
+    # SQLite performance profile, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"  # readers don't block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # durable at checkpoints, safe with WAL
+    SQLITE_CACHE_SIZE: int = -64000  # negative means KiB, so ~64MB per connection
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256MB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ms to wait for the write lock before "database is locked"
     
-    # File Upload Settings
-    UPLOAD_DIR: str = os.path.join("app", "static", "uploads")
+    # Connection pool sizing, per engine in each worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_READ_POOL_SIZE: int = 5
+    DB_READ_MAX_OVERFLOW: int = 10
+    
+    # Prometheus metrics. With several workers, point this at an empty directory
+    # (cleared before each start) so /metrics aggregates all of them.
+    METRICS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    
+    # Response encoding for list, export and report endpoints
+    RESPONSE_GZIP_MIN_BYTES: int = 1024  # smaller bodies aren't worth compressing
+    RESPONSE_GZIP_LEVEL: int = 6
+    
+    # File Upload Settings. Statements are stored by content hash, gzip-compressed,
+    # outside the public /static mount.
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", os.path.join("storage", "uploads"))
+    UPLOAD_COMPRESS_LEVEL: int = 6
+    UPLOAD_RETENTION_DAYS: int = 30  # uploads whose transactions are all gone are collected after this
+    UPLOAD_GC_GRACE_SECONDS: int = 3600  # blobs and files younger than this are never collected
     ALLOWED_EXTENSIONS: list = ["csv", "xlsx", "xls", "json", "pdf"]
     MAX_CONTENT_LENGTH: int = 16 * 1024 * 1024  # 16MB
+    
+    # Imports from every worker go through one writer per process, serialized across
+    # processes by a lock file next to the SQLite database
+    INGEST_MAX_BATCH_ROWS: int = 20000  # rows per coalesced write transaction
+    INGEST_COALESCE_MS: int = 20  # how long the writer waits for more batches to join a commit
+    INGEST_LOCK_FILE: str = ""  # defaults to <database>.ingest.lock
+    RECONCILE_WINDOW_DAYS: int = 3  # max days between a bank row and the UPI app row for the same payment
+    PRELOAD_PARSERS: bool = False  # import pandas/openpyxl at worker startup instead of on first Excel upload
 
     class Config:
         case_sensitive = True
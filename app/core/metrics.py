@@ -0,0 +1,128 @@
+import os
+import time
+
+from app.core.config import settings
+
+# In multiprocess mode every uvicorn worker writes its samples to files in this
+# directory and /metrics merges them. prometheus_client picks the mode when it
+# is imported, so the directory has to be in the environment first.
+if settings.METRICS_MULTIPROC_DIR:
+    os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event  # noqa: E402
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Seconds; parsing and ingest run far longer than a typical request
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+REQUEST_DURATION = Histogram(
+    "spendwise_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+PARSE_DURATION = Histogram(
+    "spendwise_parse_duration_seconds",
+    "Time to parse an uploaded statement",
+    ["file_type", "bank"],
+    buckets=SLOW_BUCKETS,
+)
+ROWS_PARSED = Counter(
+    "spendwise_rows_parsed_total",
+    "Transactions parsed from uploaded statements",
+    ["file_type", "bank"],
+)
+ROWS_INSERTED = Counter(
+    "spendwise_rows_inserted_total",
+    "Transactions committed by the ingest writer; rate() gives rows inserted per second",
+)
+INGEST_COMMIT_DURATION = Histogram(
+    "spendwise_ingest_commit_duration_seconds",
+    "Time to write one coalesced ingest transaction, including the wait for the writer lock",
+    buckets=SLOW_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "spendwise_db_query_duration_seconds",
+    "Time spent executing SQL statements",
+    ["engine"],
+    buckets=QUERY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "spendwise_cache_lookups_total",
+    "In-process cache lookups; hit ratio is hits / (hits + misses)",
+    ["cache", "result"],
+)
+
+def observe_parse(file_type: str, bank_type: str, rows: int, seconds: float):
+    labels = (file_type or "unknown", bank_type or "generic")
+    PARSE_DURATION.labels(*labels).observe(seconds)
+    ROWS_PARSED.labels(*labels).inc(rows)
+
+def cache_counters(name: str):
+    """(hit, miss) counters for one named cache, resolved once so lookups stay cheap"""
+    return CACHE_LOOKUPS.labels(name, "hit"), CACHE_LOOKUPS.labels(name, "miss")
+
+def instrument_engine(db_engine, name: str):
+    """Time every statement run on a (sync or async) engine"""
+    sync_engine = getattr(db_engine, "sync_engine", db_engine)
+    histogram = DB_QUERY_DURATION.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        histogram.observe(time.perf_counter() - conn.info["query_start_time"].pop())
+
+def render_metrics():
+    """Exposition body and content type, merged across workers in multiprocess mode"""
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead():
+    """Drop this worker's live samples when it exits"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+class MetricsMiddleware:
+    """ASGI middleware recording REQUEST_DURATION for every HTTP request
+
+    Labels use the matched route template (/api/transactions/{transaction_id}),
+    not the raw path, so the series count stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                route.path_format if route is not None else "unmatched",
+                str(status_code),
+            ).observe(time.perf_counter() - started)
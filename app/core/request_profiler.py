@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_SCOPE = "profile"
+_PROFILE_ID = re.compile(r"^[0-9TZ-]+-\d+-[0-9a-f]{8}$")
+
+# A thread whose innermost frame is in one of these is blocked, not working
+_IDLE_MODULES = {"threading.py", "queue.py", "selectors.py"}
+
+def create_profile_token(expires_minutes: int = 15) -> str:
+    """Sign a token that lets its holder profile requests outside DEBUG"""
+    expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
+    return jwt.encode({"scope": PROFILE_SCOPE, "exp": expire}, settings.SECRET_KEY, algorithm="HS256")
+
+def profiling_requested(header: Optional[str]) -> bool:
+    """Any X-Profile header in DEBUG, otherwise only a valid signed profile token"""
+    if not header:
+        return False
+    if settings.DEBUG:
+        return True
+    try:
+        payload = jwt.decode(header, settings.SECRET_KEY, algorithms=["HS256"])
+    except JWTError:
+        return False
+    return payload.get("scope") == PROFILE_SCOPE
+
+class StackSampler:
+    """Samples the Python stacks of every busy thread into folded-stack counts
+
+    Covers the event loop and the threadpool that runs sync endpoints and
+    aiosqlite connections, so the whole request shows up. Other requests in
+    flight in the same worker are sampled too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Brendan Gregg's folded format, readable by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# Profiles: <id>.folded (the stacks) and <id>.json (request metadata)
+
+def _profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}")
+
+def _save_profile(profile_id: str, sampler: StackSampler, metadata: dict):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(_profile_path(profile_id, "folded"), "w") as f:
+        f.write(sampler.folded())
+    with open(_profile_path(profile_id, "json"), "w") as f:
+        json.dump(metadata, f)
+    # Keep only the newest PROFILE_MAX_FILES profiles (shared by all workers)
+    for old in list_profiles()[settings.PROFILE_MAX_FILES:]:
+        for extension in ("folded", "json"):
+            try:
+                os.remove(_profile_path(old["id"], extension))
+            except FileNotFoundError:
+                pass
+
+def list_profiles() -> List[dict]:
+    """Metadata of saved profiles, newest first"""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+def profile_file(profile_id: str) -> Optional[str]:
+    """Path of a saved profile's folded stacks, None for unknown or malformed ids"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = _profile_path(profile_id, "folded")
+    return path if os.path.exists(path) else None
+
+class RequestProfilerMiddleware:
+    """ASGI middleware that profiles requests carrying an X-Profile header
+
+    In DEBUG any value turns profiling on; otherwise the header must hold a
+    token from create_profile_token (scripts/profile_token.py). One request
+    per worker is profiled at a time; the response's X-Profile-Id names the
+    saved profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope["headers"]).get(PROFILE_HEADER.encode(), b"").decode("latin-1")
+        if not profiling_requested(header) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%SZ}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        sampler = StackSampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._busy.release()
+            route = scope.get("route")
+            metadata = {
+                "id": profile_id,
+                "created_at": datetime.utcnow().isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route.path_format if route is not None else None,
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": sampler.samples,
+                "interval_ms": settings.PROFILE_SAMPLE_INTERVAL_MS,
+            }
+            try:
+                await run_in_threadpool(_save_profile, profile_id, sampler, metadata)
+            except OSError:
+                logger.exception("Could not save profile %s", profile_id)
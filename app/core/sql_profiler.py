@@ -0,0 +1,133 @@
+import heapq
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# "IN (?, ?, ?)" and "VALUES (?, ?), (?, ?)" vary with the number of ids, but
+# are the same statement for N+1 purposes
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeats with different parameters compare equal"""
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+class RequestSQLStats:
+    """SQL executed while handling one request"""
+
+    def __init__(self, slowest: int):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self._slowest_size = slowest
+        self._slowest: List[Tuple[float, int, str]] = []  # min-heap of (seconds, order, statement)
+
+    def record(self, statement: str, seconds: float):
+        self.query_count += 1
+        self.sql_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        entry = (seconds, self.query_count, statement)
+        if len(self._slowest) < self._slowest_size:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        return [(seconds, statement) for seconds, _, statement in sorted(self._slowest, reverse=True)]
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.started) * 1000
+        return (
+            f'db;dur={self.sql_seconds * 1000:.2f};desc="{self.query_count} queries", '
+            f"app;dur={total_ms:.2f}"
+        )
+
+# Stats for the request being handled in this context, None when not profiling
+_current_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("request_sql_stats", default=None)
+
+def instrument_engine(db_engine):
+    """Attribute every statement run on a (sync or async) engine to the current request"""
+    sync_engine = getattr(db_engine, "sync_engine", db_engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_profile_timer(conn, cursor, statement, parameters, context, executemany):
+        if _current_stats.get() is not None:
+            conn.info.setdefault("profile_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_profile_timer(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        started = conn.info.get("profile_start_time")
+        if stats is not None and started:
+            stats.record(statement, time.perf_counter() - started.pop())
+
+def _log_request(scope, status_code: int, stats: RequestSQLStats):
+    route = scope.get("route")
+    path = route.path_format if route is not None else scope["path"]
+    logger.info("sql_profile %s", json.dumps({
+        "method": scope["method"],
+        "path": path,
+        "status": status_code,
+        "queries": stats.query_count,
+        "sql_ms": round(stats.sql_seconds * 1000, 2),
+        "slowest": [
+            {"ms": round(seconds * 1000, 2), "sql": _WHITESPACE.sub(" ", statement)[:300]}
+            for seconds, statement in stats.slowest
+        ],
+    }))
+    for shape, count in stats.repeated_shapes(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            "Possible N+1: %s %s ran the same statement %d times: %s",
+            scope["method"], path, count, shape[:300]
+        )
+
+class SQLProfilerMiddleware:
+    """ASGI middleware that profiles the SQL behind each HTTP request
+
+    Adds a Server-Timing header (total SQL time and query count, plus total
+    handler time), logs one structured line per request with the slowest
+    statements, and warns when one statement shape repeats past
+    SQL_N_PLUS_ONE_THRESHOLD.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats(settings.SQL_PROFILE_SLOWEST)
+        token = _current_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", stats.server_timing().encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            _log_request(scope, status_code, stats)
@@ -1,24 +1,164 @@
-from sqlalchemy import create_engine
+import logging
+from functools import partial
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+def _async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (sqlite -> aiosqlite)"""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+def _is_memory_sqlite(url: str) -> bool:
+    db_url = make_url(url)
+    return db_url.get_backend_name() == "sqlite" and db_url.database in (None, "", ":memory:")
+
+def _read_only_url(url: str) -> str:
+    """Open a SQLite file database through a mode=ro URI; other URLs are returned unchanged"""
+    db_url = make_url(url)
+    if db_url.get_backend_name() != "sqlite" or _is_memory_sqlite(url):
+        return url
+    return db_url.set(
+        database=f"file:{db_url.database}",
+        query={**db_url.query, "mode": "ro", "uri": "true"},
+    ).render_as_string(hide_password=False)
+
+def sqlite_pragmas(read_only: bool = False) -> dict:
+    """The connection pragmas configured in settings, in the order they are applied
+
+    Read-only connections skip the pragmas that need write access and are
+    additionally locked to query_only.
+    """
+    pragmas = {"busy_timeout": settings.SQLITE_BUSY_TIMEOUT}
+    if read_only:
+        pragmas["query_only"] = "ON"
+    else:
+        pragmas["journal_mode"] = settings.SQLITE_JOURNAL_MODE
+        pragmas["synchronous"] = settings.SQLITE_SYNCHRONOUS
+    pragmas["cache_size"] = settings.SQLITE_CACHE_SIZE
+    pragmas["mmap_size"] = settings.SQLITE_MMAP_SIZE
+    pragmas["temp_store"] = settings.SQLITE_TEMP_STORE
+    return pragmas
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record, read_only: bool = False):
+    """Apply the SQLite performance profile to a freshly opened connection"""
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas(read_only).items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def create_db_engine(url: str, is_async: bool = False, read_only: bool = False):
+    """Create a sync or async engine with pool sizing and SQLite pragmas from settings"""
+    db_url = make_url(url)
+    is_sqlite = db_url.get_backend_name() == "sqlite"
+
+    engine_args = {}
+    if is_sqlite:
+        engine_args["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        # aiosqlite would otherwise default to NullPool and reconnect per session
+        engine_args["poolclass"] = AsyncAdaptedQueuePool if is_async else QueuePool
+        engine_args["pool_size"] = settings.DB_READ_POOL_SIZE if read_only else settings.DB_POOL_SIZE
+        engine_args["max_overflow"] = settings.DB_READ_MAX_OVERFLOW if read_only else settings.DB_MAX_OVERFLOW
+
+    if is_async:
+        db_engine = create_async_engine(url, **engine_args)
+        sync_engine = db_engine.sync_engine
+    else:
+        db_engine = sync_engine = create_engine(url, **engine_args)
+
+    if is_sqlite:
+        event.listen(sync_engine, "connect", partial(_set_sqlite_pragmas, read_only=read_only))
+
+    return db_engine
+
+def log_database_settings():
+    """Log the pragmas and pool sizes actually in effect, read back from live connections"""
+    if engine.dialect.name != "sqlite":
+        logger.info("Database engine: %s (pool_size=%s)", engine.dialect.name, settings.DB_POOL_SIZE)
+        return
+
+    for name, db_engine, read_only, pool_size in (
+        ("write", engine, False, settings.DB_POOL_SIZE),
+        ("read", read_engine, True, settings.DB_READ_POOL_SIZE),
+    ):
+        with db_engine.connect() as connection:
+            effective = {
+                pragma: connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                for pragma in sqlite_pragmas(read_only)
+            }
+        logger.info(
+            "SQLite %s settings: %s, pool_size=%s",
+            name,
+            ", ".join(f"{pragma}={value}" for pragma, value in effective.items()),
+            pool_size,
+        )
+
+_read_url = settings.READ_DATABASE_URL or settings.DATABASE_URL
+# An in-memory database can't be shared with a second pool, so reads use the write pool
+_separate_read_pool = bool(settings.READ_DATABASE_URL) or not _is_memory_sqlite(settings.DATABASE_URL)
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
+engine = create_db_engine(settings.DATABASE_URL)
+
+# Async engine for request handlers, so queries don't block the event loop
+async_engine = create_db_engine(
+    settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL), is_async=True
 )
 
+# Read-only engines for reports and listings. They never take the write lock,
+# and under WAL they read the last committed snapshot without waiting on writers.
+if _separate_read_pool:
+    read_engine = create_db_engine(_read_only_url(_read_url), read_only=True)
+    async_read_engine = create_db_engine(_async_url(_read_only_url(_read_url)), is_async=True, read_only=True)
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Objects stay usable after commit, since lazy refreshes can't run outside an await
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create Base class
 Base = declarative_base()
 
-# Dependency
+# Dependencies. get_db / get_async_db are the write path; endpoints that only
+# read use get_read_db / get_async_read_db.
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,110 @@
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, select, text, union_all
+from sqlalchemy.orm import aliased
+
+from app.models.transaction import Transaction
+
+# Cold years of history live in per-year tables with the same columns as
+# `transactions`. Date-bounded queries only touch the partitions that overlap
+# their range; unbounded ones see the hot table plus every archive.
+ARCHIVE_PREFIX = "transactions_archive_"
+_ARCHIVE_NAME = re.compile(rf"^{ARCHIVE_PREFIX}(\d{{4}})$")
+
+archive_metadata = MetaData()
+_archive_tables: Dict[int, Table] = {}
+_archive_lock = threading.Lock()
+
+# (schema_version, years) - the archive list only changes with the schema
+_archive_years_cache: Tuple[Optional[int], List[int]] = (None, [])
+
+
+def archive_table_name(year: int) -> str:
+    return f"{ARCHIVE_PREFIX}{year:04d}"
+
+
+def archive_table(year: int) -> Table:
+    """Table object for one archive year, mirroring the transactions columns"""
+    with _archive_lock:
+        if year not in _archive_tables:
+            name = archive_table_name(year)
+            table = Table(
+                name,
+                archive_metadata,
+                *[
+                    Column(column.name, column.type, primary_key=column.primary_key)
+                    for column in Transaction.__table__.columns
+                ],
+            )
+            Index(f"ix_{name}_user_date", table.c.user_id, table.c.transaction_date)
+            # Imports check archived fingerprints (services.ingest.without_archived)
+            Index(f"ix_{name}_user_fingerprint", table.c.user_id, table.c.fingerprint)
+            _archive_tables[year] = table
+        return _archive_tables[year]
+
+
+def archive_years(session) -> List[int]:
+    """Years that currently have an archive table (session or connection)
+
+    Cached against PRAGMA schema_version, so an archive created by the
+    maintenance command in another process is picked up on the next query.
+    """
+    global _archive_years_cache
+    schema_version = session.execute(text("PRAGMA schema_version")).scalar()
+    cached_version, cached_years = _archive_years_cache
+    if cached_version == schema_version:
+        return cached_years
+
+    names = session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix"
+    ), {"prefix": f"{ARCHIVE_PREFIX}%"}).scalars()
+    years = sorted(int(match.group(1)) for match in map(_ARCHIVE_NAME.match, names) if match)
+    _archive_years_cache = (schema_version, years)
+    return years
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        # An unparseable bound can't narrow the search, so treat it as open
+        return None
+
+
+def overlapping_years(session, start_date=None, end_date=None) -> List[int]:
+    """Archive years that overlap a date range (every archive when it is unbounded)"""
+    start, end = _to_datetime(start_date), _to_datetime(end_date)
+    return [
+        year for year in archive_years(session)
+        if (start is None or year >= start.year) and (end is None or year <= end.year)
+    ]
+
+
+def partition_tables(session, start_date=None, end_date=None) -> List[str]:
+    """Names of the tables a date range reads: the hot table and its overlapping archives"""
+    return [Transaction.__tablename__] + [
+        archive_table_name(year) for year in overlapping_years(session, start_date, end_date)
+    ]
+
+
+def transaction_source(session, start_date=None, end_date=None):
+    """The Transaction entity to query for a date range
+
+    Returns the plain Transaction class when no archive overlaps the range,
+    otherwise an alias over a UNION ALL of the hot table and the overlapping
+    archives. Use its attributes (source.user_id, ...) in filters.
+    """
+    overlapping = overlapping_years(session, start_date, end_date)
+    if not overlapping:
+        return Transaction
+
+    columns = [column.name for column in Transaction.__table__.columns]
+    partitions = [select(Transaction.__table__)] + [
+        select(*[archive_table(year).c[name] for name in columns]) for year in overlapping
+    ]
+    return aliased(Transaction, union_all(*partitions).subquery("transactions_all"))
@@ -0,0 +1,109 @@
+import re
+from typing import Optional, Sequence
+
+from sqlalchemy import Float, Integer, text
+
+# FTS5 index over transaction descriptions and merchants. It is an external
+# content table, so the text lives only in `transactions` and the triggers
+# below keep the index in step with every insert, update and delete. Each
+# archive table (db.partitions) gets an index of its own the same way, named
+# after it, so archived years stay searchable.
+
+
+def search_index_name(table: str = "transactions") -> str:
+    """The FTS table indexing a transactions table (the hot one or an archive)"""
+    return f"{table}_fts"
+
+
+def search_index_ddl(table: str = "transactions") -> list:
+    """Statements creating the FTS table for `table` and the triggers that keep it in sync"""
+    fts = search_index_name(table)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            description, merchant,
+            content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, description, merchant)
+            VALUES (new.id, new.description, new.merchant);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, description, merchant)
+            VALUES ('delete', old.id, old.description, old.merchant);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF description, merchant ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, description, merchant)
+            VALUES ('delete', old.id, old.description, old.merchant);
+            INSERT INTO {fts}(rowid, description, merchant)
+            VALUES (new.id, new.description, new.merchant);
+        END
+        """,
+    ]
+
+
+# Anything that is not a letter or digit separates search terms
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_index(target=None, connection=None, table: str = "transactions", **kw):
+    """Create the FTS table and its sync triggers if they don't exist.
+
+    Registered as an ``after_create`` listener on the transactions table, and
+    callable directly with a connection for existing databases and archives.
+    """
+    if connection is None:
+        connection = target
+    for statement in search_index_ddl(table):
+        connection.exec_driver_sql(statement)
+
+
+def drop_search_index(connection, table: str):
+    """Drop the FTS table of `table` and its triggers"""
+    fts = search_index_name(table)
+    for suffix in ("ai", "ad", "au"):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts}")
+
+
+def rebuild_search_index(connection, table: str = "transactions") -> int:
+    """Create the index if needed and repopulate it from its transactions table"""
+    fts = search_index_name(table)
+    create_search_index(connection=connection, table=table)
+    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return connection.exec_driver_sql(f"SELECT count(*) FROM {fts}").scalar()
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 prefix query, e.g. 'swig upi' -> '"swig"* "upi"*'
+
+    Every term must match (implicit AND). Returns None when the input has no
+    searchable terms.
+    """
+    terms = _TOKEN_PATTERN.findall(q or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_match(match_query: str, tables: Sequence[str] = ("transactions",)):
+    """Subquery of (rowid, rank) for rows matching an FTS5 query, best match first by bm25
+
+    Searches the index of each table given: the hot table and, for queries
+    that reach them, archive tables (see db.partitions.partition_tables).
+    Ids are unique across all of them, so the rowid identifies the row.
+    """
+    sql = " UNION ALL ".join(
+        f"SELECT rowid, rank FROM {fts} WHERE {fts} MATCH :match_query"
+        for fts in map(search_index_name, tables)
+    )
+    return text(sql).bindparams(match_query=match_query).columns(
+        rowid=Integer, rank=Float
+    ).subquery("search_match")
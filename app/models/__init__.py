@@ -2,5 +2,6 @@ from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.category import Category
 from app.models.category_keyword import CategoryKeyword
+from app.models.upload import ImportManifest, UploadBlob, UploadReference
 
 # Import other models as you create them
@@ -1,16 +1,26 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Boolean, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from app.core.config import settings
 from app.db.database import Base
+from app.db.search_index import create_search_index
+from app.utils.money import from_minor_units, to_minor_units
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Imports skip rows the user already has (overlapping statements)
+        Index("uq_transactions_user_fingerprint", "user_id", "fingerprint", unique=True),
+        # AUTOINCREMENT: ids of rows moved to archive tables are never handed out again
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     transaction_date = Column(DateTime)
-    amount = Column(Float)
+    amount_minor = Column(BigInteger, nullable=False, default=0)  # Integer minor units, e.g. paise
+    currency = Column(String(3), nullable=False, default=settings.DEFAULT_CURRENCY)
     description = Column(String)
     merchant = Column(String)
     is_expense = Column(Boolean, default=True)  # True for expense, False for income
@@ -19,6 +29,12 @@ class Transaction(Base):
     # Source file info
     source_file = Column(String)
     transaction_id = Column(String, nullable=True)  # Original transaction ID from bank
+    upload_id = Column(Integer, ForeignKey("upload_references.id"), nullable=True, index=True)  # The stored statement
+    fingerprint = Column(String(64), nullable=True)  # Import identity, see services.ingest.transaction_fingerprint
+    # Kind of statement the row came from: a bank mapping or a column layout (TransactionParser)
+    statement_source = Column(String, nullable=True)
+    # Set when this row is the same payment as another, imported from a different statement
+    reconciled_with_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
     
     # Metadata
     is_recurring = Column(Boolean, default=False)
@@ -28,4 +44,17 @@ class Transaction(Base):
     
     # Relationships
     user = relationship("User", back_populates="transactions")
-    category = relationship("Category", back_populates="transactions") 
\ No newline at end of file
+    category = relationship("Category", back_populates="transactions")
+    
+    @property
+    def amount(self):
+        """Exact amount in major units (Decimal), derived from amount_minor"""
+        return from_minor_units(self.amount_minor, self.currency)
+    
+    @amount.setter
+    def amount(self, value):
+        # Set currency before amount when it isn't the default
+        self.amount_minor = to_minor_units(value, self.currency)
+
+# Keep the full-text search index alongside the table
+event.listen(Transaction.__table__, "after_create", create_search_index)
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+class UploadBlob(Base):
+    """One stored file, by content; identical uploads share a blob"""
+    __tablename__ = "upload_blobs"
+
+    sha256 = Column(String(64), primary_key=True)  # hex digest of the uncompressed content
+    size = Column(BigInteger, nullable=False)
+    stored_size = Column(BigInteger, nullable=False)  # compressed, on disk
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now())  # bumped by every upload
+    
+    # Relationships
+    references = relationship("UploadReference", back_populates="blob")
+
+class UploadReference(Base):
+    """One upload by a user; its transactions point here via upload_id"""
+    __tablename__ = "upload_references"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    blob_sha256 = Column(String(64), ForeignKey("upload_blobs.sha256"), index=True)
+    filename = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    blob = relationship("UploadBlob", back_populates="references")
+
+class ImportManifest(Base):
+    """A user's import of one file's content with one parser version"""
+    __tablename__ = "import_manifests"
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_sha256", "parser_version", "bank_type", name="uq_import_manifest"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    content_sha256 = Column(String(64), nullable=False)
+    parser_version = Column(Integer, nullable=False)
+    bank_type = Column(String, nullable=False, default="")  # "" for auto-detected formats
+    upload_id = Column(Integer, ForeignKey("upload_references.id"))
+    transaction_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
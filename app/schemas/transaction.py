@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -16,6 +16,7 @@ class TransactionBase(BaseModel):
 class TransactionCreate(TransactionBase):
     """Schema for creating a transaction"""
     user_id: int
+    currency: Optional[str] = None
     source_file: Optional[str] = None
     transaction_id: Optional[str] = None
 
@@ -34,12 +35,12 @@ class TransactionResponse(TransactionBase):
     """Schema for transaction response"""
     id: int
     user_id: int
+    currency: str
     source_file: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class TransactionUploadResponse(BaseModel):
     """Schema for transaction upload response"""
@@ -49,6 +50,7 @@ class TransactionUploadResponse(BaseModel):
 
 class TransactionAnalytics(BaseModel):
     """Schema for transaction analytics"""
+    currency: str
     total_expense: float
     total_income: float
     net_cashflow: float
@@ -58,5 +60,27 @@ class TransactionAnalytics(BaseModel):
     monthly_breakdown: List[dict]
 
 class BulkTransactionDelete(BaseModel):
-    """Schema for bulk transaction deletion"""
-    transaction_ids: List[int] 
\ No newline at end of file
+    """Schema for bulk transaction deletion
+
+    Give transaction_ids, source_file, or both (rows must then match both).
+    """
+    transaction_ids: Optional[List[int]] = None
+    source_file: Optional[str] = None  # Everything imported from this file
+
+class BulkTransactionUpdate(BaseModel):
+    """Schema for updating many transactions with the same values"""
+    transaction_ids: List[int] = Field(..., min_length=1)
+    category_id: Optional[int] = None
+    is_expense: Optional[bool] = None
+    is_recurring: Optional[bool] = None
+    merchant: Optional[str] = None
+    notes: Optional[str] = None
+
+class BulkOperationResponse(BaseModel):
+    """Schema for bulk operation response"""
+    affected: int 
+
+class ReconciliationResponse(BaseModel):
+    """Schema for reconciliation response: pairs linked by each matching method"""
+    matched_by_utr: int
+    matched_by_amount: int
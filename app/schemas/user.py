@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
@@ -26,6 +26,10 @@ class UserResponse(UserBase):
     class Config:
         orm_mode = True
 
+class CurrentUser(UserResponse):
+    """Immutable snapshot of the authenticated user, safe to share between requests"""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
 class Token(BaseModel):
     """Schema for OAuth token response"""
     access_token: str
@@ -0,0 +1,111 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.partitions import transaction_source
+from app.models.upload import ImportManifest, UploadReference
+from app.services.transaction_parser import PARSER_VERSION, TransactionParser
+from app.services.upload_store import blob_path, write_compressed
+
+# Every import is recorded by (user, content hash, parser version, bank type).
+# Uploading the same bytes again finds the earlier import with one indexed
+# lookup instead of parsing and inserting everything a second time.
+
+def _bank_key(bank_type: Optional[str]) -> str:
+    return (bank_type or "").lower()
+
+async def find_import(
+    db: AsyncSession, user_id: int, sha256: str, bank_type: Optional[str]
+) -> Optional[ImportManifest]:
+    """This user's earlier import of the same content with the current parser, if any
+
+    Only while transactions from some upload of this content remain: once
+    they have all been deleted, uploading the file again imports it again.
+    """
+    source = await db.run_sync(transaction_source)
+    result = await db.execute(select(ImportManifest).where(
+        ImportManifest.user_id == user_id,
+        ImportManifest.content_sha256 == sha256,
+        ImportManifest.parser_version == PARSER_VERSION,
+        ImportManifest.bank_type == _bank_key(bank_type),
+        exists().where(source.user_id == user_id, source.upload_id.in_(
+            select(UploadReference.id).where(
+                UploadReference.user_id == user_id, UploadReference.blob_sha256 == sha256
+            )
+        )),
+    ))
+    return result.scalar_one_or_none()
+
+async def record_import(
+    db: AsyncSession, user_id: int, sha256: str, bank_type: Optional[str], upload_id: int, transaction_count: int
+) -> int:
+    """Record (or, for a forced re-import, replace) an import; returns its id"""
+    values = {"upload_id": upload_id, "transaction_count": transaction_count}
+    result = await db.execute(
+        insert(ImportManifest)
+        .values(
+            user_id=user_id, content_sha256=sha256, parser_version=PARSER_VERSION,
+            bank_type=_bank_key(bank_type), **values,
+        )
+        .on_conflict_do_update(
+            index_elements=["user_id", "content_sha256", "parser_version", "bank_type"],
+            set_={**values, "created_at": func.now()},
+        )
+        .returning(ImportManifest.id)
+    )
+    await db.commit()
+    return result.scalar_one()
+
+# Parse output, cached next to the blob it came from. It is the parser's view
+# of the file before any categorization, so it stays valid until PARSER_VERSION
+# changes and serves forced re-imports and other users uploading the same file.
+
+def _parsed_path(sha256: str, bank_type: Optional[str]) -> str:
+    return blob_path(sha256, f".parsed-v{PARSER_VERSION}-{_bank_key(bank_type) or 'auto'}.json")
+
+def save_parsed(sha256: str, bank_type: Optional[str], transactions: List[Dict[str, Any]]):
+    """Cache the fields imports use; original_data is never stored, so it is left out"""
+    rows = [
+        {
+            "transaction_date": tx["transaction_date"].isoformat(),
+            "amount": str(tx["amount"]),
+            "currency": tx.get("currency"),
+            "description": tx["description"],
+            "merchant": tx["merchant"],
+            "is_expense": tx["is_expense"],
+            "transaction_id": tx.get("transaction_id"),
+            "statement_source": tx.get("statement_source"),
+        }
+        for tx in transactions
+    ]
+    write_compressed(_parsed_path(sha256, bank_type), json.dumps(rows, default=str).encode())
+
+def load_parsed(sha256: str, bank_type: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Cached parse output for this content and parser version, None when there is none"""
+    try:
+        with gzip.open(_parsed_path(sha256, bank_type), "rb") as f:
+            rows = json.load(f)
+    except (OSError, EOFError, ValueError):
+        # Missing or damaged; the caller parses the file again
+        return None
+    for row in rows:
+        row["transaction_date"] = datetime.fromisoformat(row["transaction_date"])
+        row["amount"] = Decimal(row["amount"])
+    return rows
+
+def parse_with_cache(
+    parser: TransactionParser, content: bytes, file_extension: str, sha256: str, bank_type: Optional[str]
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Parse output for the content, from the cache when possible; returns (transactions, was cached)"""
+    transactions = load_parsed(sha256, bank_type)
+    if transactions is not None:
+        return transactions, True
+    transactions = parser.parse_content(content, file_extension, bank_type)
+    save_parsed(sha256, bank_type, transactions)
+    return transactions, False
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to SQLite's busy timeout alone
+    fcntl = None
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.metrics import INGEST_COMMIT_DURATION, ROWS_INSERTED
+from app.db.database import engine
+from app.db.partitions import archive_table, archive_years
+from app.models.transaction import Transaction
+from app.utils.money import to_minor_units
+
+logger = logging.getLogger(__name__)
+
+# Bound parameters per IN (...) lookup, well under SQLite's variable limit
+_IN_CHUNK = 500
+
+def ingest_lock_path(url: str = None) -> Optional[str]:
+    """Lock file shared by every worker writing to the same SQLite database"""
+    if settings.INGEST_LOCK_FILE:
+        return settings.INGEST_LOCK_FILE
+    db_url = make_url(url or settings.DATABASE_URL)
+    if db_url.get_backend_name() != "sqlite" or db_url.database in (None, "", ":memory:"):
+        return None
+    return f"{db_url.database}.ingest.lock"
+
+@contextmanager
+def ingest_write_lock(path: Optional[str]):
+    """Hold the cross-process ingest lock; a no-op without a lock file or fcntl"""
+    if path is None or fcntl is None:
+        yield
+        return
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+def normalize_description(description) -> str:
+    """Case, punctuation and spacing differences between exports don't make a different transaction"""
+    return _NON_WORD.sub(" ", str(description or "")).strip().casefold()
+
+def occurrence_key(transaction_date, amount_minor: int, currency: str, description) -> tuple:
+    """What two rows without a bank transaction id share when they are the same transaction"""
+    day = transaction_date.date() if isinstance(transaction_date, datetime) else transaction_date
+    return (str(day), amount_minor, currency, normalize_description(description))
+
+def transaction_fingerprint(
+    transaction_id: Optional[str], key: tuple, occurrence: int = 0, source: Optional[str] = None
+) -> str:
+    """Deterministic identity of an imported transaction, the same in every statement that contains it
+
+    The bank's transaction id / UTR when the statement has one, scoped to the
+    statement's source: the bank's and the UPI app's row of one payment share
+    a UTR, and both are imported so reconciliation can link them. Otherwise
+    the occurrence_key() (date, amount, normalized description) plus which
+    occurrence of that key it is within its statement, so two identical
+    coffees on one day stay two transactions while overlapping statements
+    still line up.
+    """
+    if transaction_id:
+        identity = f"id|{source or ''}|{str(transaction_id).strip()}"
+    else:
+        identity = "row|" + "|".join(str(part) for part in key) + f"|{occurrence}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+def transaction_insert_rows(
+    user_id: int, transactions: Iterable[Dict[str, Any]], source_file: str = None, upload_id: int = None
+) -> List[Dict[str, Any]]:
+    """Column values for parsed transactions (one statement), ready for a bulk INSERT"""
+    rows = []
+    occurrences: Counter = Counter()
+    for tx_data in transactions:
+        currency = (tx_data.get("currency") or settings.DEFAULT_CURRENCY).upper()
+        amount_minor = to_minor_units(tx_data["amount"], currency)
+        transaction_id = tx_data.get("transaction_id") or None
+        key = occurrence_key(tx_data["transaction_date"], amount_minor, currency, tx_data["description"])
+        occurrence = 0
+        if not transaction_id:
+            occurrence = occurrences[key]
+            occurrences[key] += 1
+        rows.append({
+            "user_id": user_id,
+            "transaction_date": tx_data["transaction_date"],
+            "amount_minor": amount_minor,
+            "currency": currency,
+            "description": tx_data["description"],
+            "merchant": tx_data["merchant"],
+            "is_expense": tx_data["is_expense"],
+            "source_file": source_file,
+            "transaction_id": transaction_id,
+            "upload_id": upload_id,
+            "fingerprint": transaction_fingerprint(transaction_id, key, occurrence, tx_data.get("statement_source")),
+            "statement_source": tx_data.get("statement_source"),
+        })
+    return rows
+
+def without_archived(connection, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop rows (one user's batch) whose fingerprint the user already has in an archive table
+
+    Only archives of the years the batch's dates fall in are checked.
+    """
+    years = {row["transaction_date"].year for row in rows if row["transaction_date"] is not None}
+    archived = [year for year in archive_years(connection) if year in years]
+    if not archived:
+        return rows
+
+    user_id = rows[0]["user_id"]
+    fingerprints = [row["fingerprint"] for row in rows]
+    existing = set()
+    for year in archived:
+        table = archive_table(year)
+        for start in range(0, len(fingerprints), _IN_CHUNK):
+            existing.update(connection.execute(
+                select(table.c.fingerprint).where(
+                    table.c.user_id == user_id,
+                    table.c.fingerprint.in_(fingerprints[start:start + _IN_CHUNK]),
+                )
+            ).scalars())
+    return [row for row in rows if row["fingerprint"] not in existing]
+
+class IngestCoordinator:
+    """Single writer for imported transactions in this process
+
+    Uploads hand their rows to a queue instead of opening their own write
+    transaction. One writer thread drains the queue, coalescing whatever
+    batches arrive within INGEST_COALESCE_MS into one transaction, and takes
+    a file lock around each commit so the writers of all uvicorn workers
+    queue up behind each other instead of failing with "database is locked".
+    """
+
+    def __init__(
+        self,
+        bind=engine,
+        lock_path: Optional[str] = None,
+        max_batch_rows: int = None,
+        coalesce_seconds: float = None,
+    ):
+        self.bind = bind
+        self.lock_path = lock_path
+        self.max_batch_rows = max_batch_rows or settings.INGEST_MAX_BATCH_ROWS
+        self.coalesce_seconds = (
+            settings.INGEST_COALESCE_MS / 1000 if coalesce_seconds is None else coalesce_seconds
+        )
+        self.commits = 0
+        self.batches = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, rows: List[Dict[str, Any]]) -> Future:
+        """Queue rows for insertion; the future resolves to the number inserted once committed
+
+        Rows whose (user_id, fingerprint) already exists are skipped, so the
+        count is lower when a statement overlaps one imported before.
+        """
+        future = Future()
+        if not rows:
+            future.set_result(0)
+            return future
+        self._ensure_started()
+        self._queue.put((rows, future))
+        return future
+
+    async def ingest(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows through the writer and wait for their commit"""
+        return await asyncio.wrap_future(self.submit(rows))
+
+    def stop(self, timeout: float = None):
+        """Write whatever is queued, then stop the writer thread"""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending, row_count = [item], len(item[0])
+            stopping = False
+
+            # Let batches arriving shortly after the first share its transaction
+            deadline = time.monotonic() + self.coalesce_seconds
+            while row_count < self.max_batch_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                pending.append(item)
+                row_count += len(item[0])
+
+            self._write(pending)
+            if stopping:
+                return
+
+    def _write(self, pending):
+        # Skip batches whose uploader gave up (e.g. the client disconnected)
+        pending = [(rows, future) for rows, future in pending if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        with ingest_write_lock(self.lock_path):
+            try:
+                inserted = self._insert(pending)
+            except Exception as e:
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                    return
+                # One bad batch shouldn't fail the uploads it was coalesced with
+                logger.warning("Coalesced ingest of %d batches failed, retrying one by one", len(pending))
+                for batch in pending:
+                    try:
+                        inserted = self._insert([batch])
+                    except Exception as e:
+                        batch[1].set_exception(e)
+                    else:
+                        batch[1].set_result(inserted[0])
+                return
+        INGEST_COMMIT_DURATION.observe(time.perf_counter() - started)
+
+        for (_, future), count in zip(pending, inserted):
+            future.set_result(count)
+
+    def _insert(self, pending) -> List[int]:
+        """Insert every batch in one transaction; returns the rows each one added"""
+        # Already imported rows (same user and fingerprint) are skipped by the
+        # unique index, so deduplication costs one index probe per row
+        statement = insert(Transaction).on_conflict_do_nothing(index_elements=["user_id", "fingerprint"])
+        with self.bind.begin() as connection:
+            inserted = []
+            for rows, _ in pending:
+                # The unique index only covers the hot table
+                rows = without_archived(connection, rows)
+                inserted.append(connection.execute(statement, rows).rowcount if rows else 0)
+        self.commits += 1
+        self.batches += len(pending)
+        ROWS_INSERTED.inc(sum(inserted))
+        return inserted
+
+# Shared by the upload endpoints of this worker process
+ingest_coordinator = IngestCoordinator(lock_path=ingest_lock_path())
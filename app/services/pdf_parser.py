@@ -1,14 +1,95 @@
 import os
 import re
-import pandas as pd
 import json
+from functools import lru_cache
 from datetime import datetime
 import PyPDF2
-from tabula import read_pdf
 import logging
 
+# Statement sources (PhonePe, Google Pay, banks) and how to parse each
+SOURCE_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'pdf_sources.json')
+
+# PhonePe format: Date\nTime\nTYPE\n₹Amount\nPaid to/Received from Description\nTransaction ID TXNID\nUTR No. UTRNO\nPaid by/Credited to\nACCOUNT
+PHONEPE_TRANSACTION_BLOCK = re.compile(
+    r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s\d{2},\s\d{4})\s*'
+    r'(\d{2}:\d{2}\s[AP]M)\s*'
+    r'(DEBIT|CREDIT)\s*'
+    r'₹([\d,]+)\s*'
+    r'((?:Paid to|Received from).*?)(?=(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s\d{2},\s\d{4}|Page|This is an)',
+    re.DOTALL
+)
+
+
+class PdfDocument:
+    """
+    A PDF opened once, with the text of each page extracted on first use and cached.
+    
+    Source detection and the parsing strategies share one instance, so the file
+    is opened and every page's text is extracted at most once per document.
+    """
+    
+    def __init__(self, pdf):
+        """
+        Args:
+            pdf (str or binary file): Path to the PDF file, or an open stream
+                (an upload held in memory); a stream is left open on close
+        """
+        self.source = pdf
+        if isinstance(pdf, str):
+            self.path = pdf
+            self._file = open(pdf, 'rb')
+        else:
+            self.path = getattr(pdf, 'name', '<stream>')
+            self._file = None
+        try:
+            self.reader = PyPDF2.PdfReader(self._file or pdf)
+        except Exception:
+            self.close()
+            raise
+        self._page_text = {}
+    
+    def __len__(self):
+        return len(self.reader.pages)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+    
+    def page_text(self, page_num):
+        """
+        Text of one page, extracted the first time it is asked for.
+        
+        Args:
+            page_num (int): Zero-based page number
+            
+        Returns:
+            str: Extracted page text
+        """
+        if page_num not in self._page_text:
+            self._page_text[page_num] = self.reader.pages[page_num].extract_text()
+        return self._page_text[page_num]
+    
+    def pages(self, start_page=0, end_page=None):
+        """
+        Yield (page number, text) for a range of pages, extracting lazily.
+        
+        Args:
+            start_page (int): First page, zero-based
+            end_page (int, optional): Page to stop before, defaults to the last page
+        """
+        end_page = len(self) if end_page is None else min(end_page, len(self))
+        for page_num in range(start_page, end_page):
+            yield page_num, self.page_text(page_num)
+
+
 class ExpenseParser:
-    def __init__(self, config_path='source_configs.json'):
+    def __init__(self, config_path=SOURCE_CONFIG_PATH):
         """
         Initialize the parser with configurations for different statement sources.
         
@@ -43,32 +124,34 @@ class ExpenseParser:
             
         return logger
     
-    def detect_source(self, pdf_path):
+    def detect_source(self, document):
         """
         Detect the source of the statement based on content patterns.
         
         Args:
-            pdf_path (str): Path to the PDF file
+            document (PdfDocument or str): Open document (its cached first page is reused) or path to the PDF
             
         Returns:
             str: Detected source name or None if not detected
         """
-        self.logger.info(f"Detecting source for {pdf_path}")
+        if not isinstance(document, PdfDocument):
+            with PdfDocument(document) as opened:
+                return self.detect_source(opened)
+        
+        self.logger.info(f"Detecting source for {document.path}")
         
         # Extract text from first page to identify source
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            if len(reader.pages) > 0:
-                first_page_text = reader.pages[0].extract_text()
-                
-                # Check for patterns to identify source
-                for source, config in self.source_configs.items():
-                    if 'identifier_pattern' in config:
-                        if re.search(config['identifier_pattern'], first_page_text, re.IGNORECASE):
-                            self.logger.info(f"Detected source: {source}")
-                            return source
+        if len(document) > 0:
+            first_page_text = document.page_text(0)
+            
+            # Check for patterns to identify source
+            for source, config in self.source_configs.items():
+                if 'identifier_pattern' in config:
+                    if re.search(config['identifier_pattern'], first_page_text, re.IGNORECASE):
+                        self.logger.info(f"Detected source: {source}")
+                        return source
         
-        self.logger.warning(f"Could not detect source for {pdf_path}")
+        self.logger.warning(f"Could not detect source for {document.path}")
         return None
     
     def parse_pdf(self, pdf_path):
@@ -79,131 +162,121 @@ class ExpenseParser:
             pdf_path (str): Path to the PDF file
             
         Returns:
-            dict: Parsed data with standardized fields
+            list: Parsed records with standardized fields, or None if the source is unknown
         """
         self.logger.info(f"Starting to parse {pdf_path}")
         
-        # Detect source
-        source = self.detect_source(pdf_path)
-        if not source:
-            self.logger.error("Cannot parse PDF with unknown source")
-            return None
+        with PdfDocument(pdf_path) as document:
+            source = self.detect_source(document)
+            if not source:
+                self.logger.error("Cannot parse PDF with unknown source")
+                return None
+            if source not in self.source_configs:
+                self.logger.error(f"No configuration found for source: {source}")
+                return None
             
-        # Get parser method based on source
-        if source in self.source_configs:
-            config = self.source_configs[source]
+            data = list(self.iter_records(document, source))
+        
+        self.logger.info(f"Successfully parsed {len(data)} records from {pdf_path}")
+        return data
+    
+    def iter_records(self, document, source):
+        """
+        Yield the records of an open document page by page, tagged with their source.
+        
+        Args:
+            document (PdfDocument): Open document, shared with detect_source
+            source (str): Source name from detect_source
             
-            # Determine parsing method based on config
-            if config.get('parsing_method') == 'tabula':
-                data = self._parse_tabular_pdf(pdf_path, config)
-            elif config.get('parsing_method') == 'text':
-                data = self._parse_text_pdf(pdf_path, config)
-            elif config.get('parsing_method') == 'phonepe_text':
-                data = self._parse_phonepe_statement(pdf_path, config)
-            else:
-                self.logger.error(f"Unknown parsing method for source: {source}")
-                return None
-                
-            # Add source information to parsed data
-            for record in data:
-                record['source'] = source
-                
-            self.logger.info(f"Successfully parsed {len(data)} records from {pdf_path}")
-            return data
+        Yields:
+            dict: Parsed record with standardized fields
+        """
+        config = self.source_configs[source]
+        
+        # Determine parsing method based on config
+        if config.get('parsing_method') == 'tabula':
+            records = self._parse_tabular_pdf(document, config)
+        elif config.get('parsing_method') == 'text':
+            records = self._parse_text_pdf(document, config)
+        elif config.get('parsing_method') == 'phonepe_text':
+            records = self._parse_phonepe_statement(document, config)
         else:
-            self.logger.error(f"No configuration found for source: {source}")
-            return None
+            self.logger.error(f"Unknown parsing method for source: {source}")
+            return
+        
+        # Add source information to parsed data
+        for record in records:
+            record['source'] = source
+            yield record
     
-    def _parse_phonepe_statement(self, pdf_path, config):
+    def _parse_phonepe_statement(self, document, config):
         """
         Parse PhonePe statements using a custom approach based on the observed structure.
         
         Args:
-            pdf_path (str): Path to the PDF file
+            document (PdfDocument): Open document
             config (dict): Source-specific configuration
             
-        Returns:
-            list: List of dictionaries containing parsed data
+        Yields:
+            dict: Parsed record, page by page
         """
-        self.logger.info(f"Parsing PhonePe statement: {pdf_path}")
+        self.logger.info(f"Parsing PhonePe statement: {document.path}")
         
         try:
-            all_records = []
-            
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(reader.pages)):
-                    text = reader.pages[page_num].extract_text()
+            for _, text in document.pages():
+                # Extract the transaction blocks using regex
+                for match in PHONEPE_TRANSACTION_BLOCK.finditer(text):
+                    date_str = match.group(1)
+                    time_str = match.group(2)
+                    txn_type = match.group(3)
+                    amount_str = match.group(4)
+                    description_block = match.group(5).strip()
                     
-                    # Extract the transaction blocks using regex
-                    # PhonePe format: Date\nTime\nTYPE\n₹Amount\nPaid to/Received from Description\nTransaction ID TXNID\nUTR No. UTRNO\nPaid by/Credited to\nACCOUNT
-                    transaction_blocks = re.finditer(
-                        r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s\d{2},\s\d{4})\s*'
-                        r'(\d{2}:\d{2}\s[AP]M)\s*'
-                        r'(DEBIT|CREDIT)\s*'
-                        r'₹([\d,]+)\s*'
-                        r'((?:Paid to|Received from).*?)(?=(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s\d{2},\s\d{4}|Page|This is an)',
-                        text, re.DOTALL
-                    )
+                    # Extract additional details from the description block
+                    description_lines = description_block.split('\n')
+                    description = description_lines[0].strip()
                     
-                    for match in transaction_blocks:
-                        date_str = match.group(1)
-                        time_str = match.group(2)
-                        txn_type = match.group(3)
-                        amount_str = match.group(4)
-                        description_block = match.group(5).strip()
-                        
-                        # Extract additional details from the description block
-                        description_lines = description_block.split('\n')
-                        description = description_lines[0].strip()
-                        
-                        # Extract transaction ID and UTR if available
-                        txn_id = ""
-                        utr_no = ""
-                        account = ""
-                        
-                        for line in description_lines:
-                            if "Transaction ID" in line:
-                                txn_id = line.split("Transaction ID")[1].strip()
-                            elif "UTR No." in line:
-                                utr_no = line.split("UTR No.")[1].strip()
-                            elif "Paid by" in line or "Credited to" in line:
-                                account = description_lines[-1].strip()
-                        
-                        # Convert date string to standardized format
-                        try:
-                            date_obj = datetime.strptime(date_str, "%b %d, %Y")
-                            standard_date = date_obj.strftime("%Y-%m-%d")
-                        except ValueError:
-                            self.logger.warning(f"Could not parse date: {date_str}")
-                            standard_date = date_str
-                        
-                        # Clean amount
-                        amount = float(amount_str.replace(',', ''))
-                        if txn_type == "DEBIT":
-                            amount = -amount
-                        
-                        # Create record
-                        record = {
-                            'date': standard_date,
-                            'time': time_str,
-                            'description': description,
-                            'amount': amount,
-                            'type': txn_type,
-                            'transaction_id': txn_id,
-                            'utr_no': utr_no,
-                            'account': account,
-                            'category': self._categorize_transaction(description, config.get('category_rules', []))
-                        }
-                        
-                        all_records.append(record)
-            
-            return all_records
+                    # Extract transaction ID and UTR if available
+                    txn_id = ""
+                    utr_no = ""
+                    account = ""
+                    
+                    for line in description_lines:
+                        if "Transaction ID" in line:
+                            txn_id = line.split("Transaction ID")[1].strip()
+                        elif "UTR No." in line:
+                            utr_no = line.split("UTR No.")[1].strip()
+                        elif "Paid by" in line or "Credited to" in line:
+                            account = description_lines[-1].strip()
+                    
+                    # Convert date string to standardized format
+                    try:
+                        date_obj = datetime.strptime(date_str, "%b %d, %Y")
+                        standard_date = date_obj.strftime("%Y-%m-%d")
+                    except ValueError:
+                        self.logger.warning(f"Could not parse date: {date_str}")
+                        standard_date = date_str
+                    
+                    # Clean amount
+                    amount = float(amount_str.replace(',', ''))
+                    if txn_type == "DEBIT":
+                        amount = -amount
+                    
+                    yield {
+                        'date': standard_date,
+                        'time': time_str,
+                        'description': description,
+                        'amount': amount,
+                        'type': txn_type,
+                        'transaction_id': txn_id,
+                        'utr_no': utr_no,
+                        'account': account,
+                        'category': self._categorize_transaction(description, config.get('category_rules', []))
+                    }
             
         except Exception as e:
+            # Records of the pages before the failure have already been yielded
             self.logger.error(f"Error parsing PhonePe statement: {str(e)}")
-            return []
     
     def _categorize_transaction(self, description, category_rules):
         """
@@ -224,23 +297,33 @@ class ExpenseParser:
         
         return 'uncategorized'
     
-    def _parse_tabular_pdf(self, pdf_path, config):
+    def _parse_tabular_pdf(self, document, config):
         """
         Parse PDFs that have tabular structure using tabula-py.
         
+        tabula reads the file itself, in a single run over all pages; only
+        source detection goes through the document's page cache.
+        
         Args:
-            pdf_path (str): Path to the PDF file
+            document (PdfDocument): Open document
             config (dict): Source-specific configuration
             
-        Returns:
-            list: List of dictionaries containing parsed data
+        Yields:
+            dict: Processed record, table by table
         """
-        self.logger.info(f"Parsing tabular PDF: {pdf_path}")
+        self.logger.info(f"Parsing tabular PDF: {document.path}")
         
         try:
+            # tabula-py (and the Java runtime it drives) is only needed for tabular sources
+            from tabula import read_pdf
+            
+            source = document.source
+            if not isinstance(source, str):
+                source.seek(0)
+            
             # Parse tables from PDF
             tables = read_pdf(
-                pdf_path,
+                source,
                 pages='all',
                 guess=config.get('guess_table', True),
                 area=config.get('table_area'),
@@ -248,73 +331,52 @@ class ExpenseParser:
                 pandas_options={'header': config.get('header_row', 0)}
             )
             
-            all_records = []
+            # Handle column mapping
+            column_map = config.get('column_mapping', {})
             
             for table in tables:
-                # Handle column mapping
-                column_map = config.get('column_mapping', {})
-                
                 # Normalize column names if needed
                 if column_map:
                     table = table.rename(columns=column_map)
                 
-                # Convert to dictionaries
-                records = table.to_dict('records')
-                
                 # Process each record with field transformations
-                for record in records:
+                for record in table.to_dict('records'):
                     processed_record = self._process_record(record, config)
                     if processed_record:
-                        all_records.append(processed_record)
-            
-            return all_records
+                        yield processed_record
             
         except Exception as e:
             self.logger.error(f"Error parsing tabular PDF: {str(e)}")
-            return []
     
-    def _parse_text_pdf(self, pdf_path, config):
+    def _parse_text_pdf(self, document, config):
         """
         Parse PDFs by extracting and processing text.
         
         Args:
-            pdf_path (str): Path to the PDF file
+            document (PdfDocument): Open document
             config (dict): Source-specific configuration
             
-        Returns:
-            list: List of dictionaries containing parsed data
+        Yields:
+            dict: Processed record, page by page
         """
-        self.logger.info(f"Parsing text-based PDF: {pdf_path}")
+        self.logger.info(f"Parsing text-based PDF: {document.path}")
+        
+        # Use regex pattern to extract transaction data
+        pattern = config.get('transaction_pattern')
+        if not pattern:
+            return
         
         try:
-            all_records = []
-            
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                # Process pages based on configuration
-                start_page = config.get('start_page', 0)
-                end_page = config.get('end_page', len(reader.pages))
-                
-                for page_num in range(start_page, min(end_page, len(reader.pages))):
-                    text = reader.pages[page_num].extract_text()
-                    
-                    # Use regex pattern to extract transaction data
-                    pattern = config.get('transaction_pattern')
-                    if pattern:
-                        matches = re.finditer(pattern, text, re.MULTILINE)
-                        
-                        for match in matches:
-                            record = match.groupdict()
-                            processed_record = self._process_record(record, config)
-                            if processed_record:
-                                all_records.append(processed_record)
-            
-            return all_records
+            # Process pages based on configuration
+            pages = document.pages(config.get('start_page', 0), config.get('end_page'))
+            for _, text in pages:
+                for match in re.finditer(pattern, text, re.MULTILINE):
+                    processed_record = self._process_record(match.groupdict(), config)
+                    if processed_record:
+                        yield processed_record
             
         except Exception as e:
             self.logger.error(f"Error parsing text PDF: {str(e)}")
-            return []
     
     def _process_record(self, record, config):
         """
@@ -395,6 +457,7 @@ class ExpenseParser:
             return False
             
         try:
+            import pandas as pd
             df = pd.DataFrame(data)
             df.to_csv(output_path, index=False)
             self.logger.info(f"Saved {len(data)} records to {output_path}")
@@ -430,6 +493,12 @@ class ExpenseParser:
             return {'records': data}
 
 
+@lru_cache(maxsize=None)
+def expense_parser():
+    """The shared ExpenseParser, so the source configurations are read once per process"""
+    return ExpenseParser()
+
+
 # Example of usage
 def parse_and_analyze_statements(pdf_dir, output_dir='output'):
     """
@@ -486,32 +555,13 @@ def extract_phonepe_descriptions(pdf_path):
         list: List of transaction descriptions
     """
     try:
-        descriptions = []
-        
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            
-            for page_num in range(len(reader.pages)):
-                text = reader.pages[page_num].extract_text()
-                
-                # Extract the transaction blocks using regex
-                transaction_blocks = re.finditer(
-                    r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s\d{2},\s\d{4})\s*'
-                    r'(\d{2}:\d{2}\s[AP]M)\s*'
-                    r'(DEBIT|CREDIT)\s*'
-                    r'₹([\d,]+)\s*'
-                    r'((?:Paid to|Received from).*?)(?=(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s\d{2},\s\d{4}|Page|This is an)',
-                    text, re.DOTALL
-                )
-                
-                for match in transaction_blocks:
-                    description_block = match.group(5).strip()
-                    description_lines = description_block.split('\n')
-                    # First line contains the main description
-                    description = description_lines[0].strip()
-                    descriptions.append(description)
-        
-        return descriptions
+        with PdfDocument(pdf_path) as document:
+            return [
+                # First line contains the main description
+                match.group(5).strip().split('\n')[0].strip()
+                for _, text in document.pages()
+                for match in PHONEPE_TRANSACTION_BLOCK.finditer(text)
+            ]
             
     except Exception as e:
         print(f"Error extracting PhonePe descriptions: {str(e)}")
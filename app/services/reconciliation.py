@@ -0,0 +1,211 @@
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.models.transaction import Transaction
+from app.services.ingest import ingest_lock_path, ingest_write_lock, normalize_description
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# The same payment often arrives twice: once from the bank statement and once
+# from a UPI app (PhonePe) statement. Reconciliation pairs such rows across
+# statement kinds (Transaction.statement_source), keeps the one with the richer
+# description and links the other to it through reconciled_with_id, which
+# takes it out of listings and reports. Two statements of the same kind (say
+# January's and February's from one bank) are never paired: their rows are
+# different payments, and overlaps between them are already dropped on import.
+
+# UPI reference numbers (UTR) are 12 digits; bank narrations embed them, e.g. "UPI/412345678901/Swiggy"
+_UTR = re.compile(r"(?<!\d)\d{12}(?!\d)")
+
+# How far along the sorted rows the amount sweep looks for a partner
+_NEIGHBOURS = 4
+
+_COLUMNS = (
+    Transaction.id, Transaction.upload_id, Transaction.source_file, Transaction.transaction_date,
+    Transaction.amount_minor, Transaction.currency, Transaction.description, Transaction.merchant,
+    Transaction.transaction_id, Transaction.category_id, Transaction.is_expense, Transaction.statement_source,
+)
+
+def transaction_utr(transaction_id: Optional[str], description: Optional[str]) -> Optional[str]:
+    """The UTR of a UPI payment, from its transaction id or its narration"""
+    for text in (transaction_id, description):
+        match = _UTR.search(text or "")
+        if match:
+            return match.group(0)
+    return None
+
+def description_richness(description: Optional[str], merchant: Optional[str]) -> Tuple[int, int]:
+    """Orders descriptions by how much they tell: distinct words first, then length"""
+    words = normalize_description(f"{description or ''} {merchant or ''}").split()
+    return len(set(words)), len(" ".join(words))
+
+def _statement_kind(row) -> object:
+    """What a row is matched across: its statement kind, or its upload when that wasn't recorded"""
+    if row.statement_source is not None:
+        return row.statement_source
+    return ("upload", row.upload_id if row.upload_id is not None else row.source_file)
+
+def _day(value) -> int:
+    return value.toordinal() if value is not None else 0
+
+def match_by_utr(rows: list, utrs: List[Optional[str]], sources: "np.ndarray") -> List[Tuple[int, int]]:
+    """Pairs (row indexes) from different sources that share a UTR and an amount"""
+    first_by_utr: Dict[Tuple[str, int], int] = {}
+    pairs = []
+    for index, (row, utr) in enumerate(zip(rows, utrs)):
+        if utr is None:
+            continue
+        key = (utr, abs(row.amount_minor))
+        other = first_by_utr.get(key)
+        if other is None:
+            first_by_utr[key] = index
+        elif sources[other] != sources[index]:
+            pairs.append((other, index))
+            del first_by_utr[key]
+    return pairs
+
+def match_by_amount(
+    amounts: "np.ndarray", days: "np.ndarray", currencies: "np.ndarray", expenses: "np.ndarray",
+    has_utr: "np.ndarray", sources: "np.ndarray", window_days: int,
+) -> List[Tuple[int, int]]:
+    """Pairs (row indexes) from different sources with equal amounts at most window_days apart
+
+    Both rows must be expenses or both income, so a refund never pairs with
+    its purchase, and at most one may carry a UTR: two different UTRs are
+    two different payments.
+
+    A sort-merge sweep: rows are sorted by (currency, direction, amount, day),
+    so a row's candidate partners are its next few neighbours. Each pass pairs
+    eligible rows greedily, nearest neighbours first, and drops them; the next
+    pass looks at the new neighbours, until a pass finds nothing.
+    O(n log n) per pass, and passes are few in practice.
+    """
+    import numpy as np
+    
+    remaining = np.arange(len(amounts))
+    pairs = []
+    while len(remaining) > 1:
+        order = remaining[np.lexsort(
+            (days[remaining], amounts[remaining], expenses[remaining], currencies[remaining])
+        )]
+        taken = np.zeros(len(order), dtype=bool)
+        found = False
+        # Looking past the adjacent row gets around neighbours that may not pair (same source, both with a UTR)
+        for offset in range(1, min(_NEIGHBOURS, len(order) - 1) + 1):
+            left, right = order[:-offset], order[offset:]
+            candidates = np.flatnonzero(
+                (amounts[left] == amounts[right])
+                & (currencies[left] == currencies[right])
+                & (expenses[left] == expenses[right])
+                & (sources[left] != sources[right])
+                & ~(has_utr[left] & has_utr[right])
+                & (days[right] - days[left] <= window_days)
+            )
+            for position in candidates:
+                if not taken[position] and not taken[position + offset]:
+                    taken[position] = taken[position + offset] = True
+                    pairs.append((int(order[position]), int(order[position + offset])))
+                    found = True
+        if not found:
+            break
+        remaining = order[~taken]
+    return pairs
+
+def reconcile_user(connection, user_id: int, window_days: int = 3) -> Dict[str, int]:
+    """Link one user's duplicate payments across statements; returns the pairs found per method
+
+    Only imported rows in the hot table that are not linked yet take part.
+    Matching is on UTR first, then on amount and direction within window_days
+    (see match_by_amount). Rows imported before statement kinds were recorded
+    are told apart by upload and only matched by UTR.
+    """
+    # numpy is imported here so API workers only load it once someone reconciles
+    import numpy as np
+    
+    rows = connection.execute(
+        select(*_COLUMNS).where(
+            Transaction.user_id == user_id,
+            Transaction.reconciled_with_id.is_(None),
+            Transaction.source_file.is_not(None),
+        )
+    ).all()
+    if len(rows) < 2:
+        return {"matched_by_utr": 0, "matched_by_amount": 0}
+
+    # Rows pair only across statement kinds, never across uploads of one kind
+    source_ids: Dict[object, int] = {}
+    sources = np.array(
+        [source_ids.setdefault(_statement_kind(row), len(source_ids)) for row in rows],
+        dtype=np.int64,
+    )
+    if len(source_ids) < 2:
+        return {"matched_by_utr": 0, "matched_by_amount": 0}
+
+    utrs = [transaction_utr(row.transaction_id, row.description) for row in rows]
+    utr_pairs = match_by_utr(rows, utrs, sources)
+
+    # The amount sweep only sees rows the UTR pass left unpaired, and only
+    # those of a known kind: two uploads of unknown kind may be the same bank
+    excluded = np.array([row.statement_source is None for row in rows], dtype=bool)
+    for a, b in utr_pairs:
+        excluded[a] = excluded[b] = True
+    rest = np.flatnonzero(~excluded)
+    currency_codes: Dict[str, int] = {}
+    amount_pairs = match_by_amount(
+        np.array([abs(rows[i].amount_minor) for i in rest], dtype=np.int64),
+        np.array([_day(rows[i].transaction_date) for i in rest], dtype=np.int64),
+        np.array([currency_codes.setdefault(rows[i].currency, len(currency_codes)) for i in rest], dtype=np.int64),
+        np.array([bool(rows[i].is_expense) for i in rest], dtype=bool),
+        np.array([utrs[i] is not None for i in rest], dtype=bool),
+        sources[rest],
+        window_days,
+    )
+    amount_pairs = [(int(rest[a]), int(rest[b])) for a, b in amount_pairs]
+
+    _link(connection, rows, utr_pairs + amount_pairs)
+    return {"matched_by_utr": len(utr_pairs), "matched_by_amount": len(amount_pairs)}
+
+def _link(connection, rows: list, pairs: List[Tuple[int, int]]):
+    """Keep the richer row of each pair, filling its gaps from the other, and link the other to it"""
+    kept_updates, link_updates = [], []
+    for a, b in pairs:
+        keep, drop = rows[a], rows[b]
+        if description_richness(drop.description, drop.merchant) > description_richness(keep.description, keep.merchant):
+            keep, drop = drop, keep
+        filled = {
+            "b_id": keep.id,
+            "b_merchant": keep.merchant or drop.merchant,
+            "b_transaction_id": keep.transaction_id or drop.transaction_id,
+            "b_category_id": keep.category_id if keep.category_id is not None else drop.category_id,
+        }
+        if (filled["b_merchant"], filled["b_transaction_id"], filled["b_category_id"]) != (
+            keep.merchant, keep.transaction_id, keep.category_id
+        ):
+            kept_updates.append(filled)
+        link_updates.append({"b_id": drop.id, "b_kept_id": keep.id})
+    if not pairs:
+        return
+
+    if kept_updates:
+        connection.execute(
+            update(Transaction).where(Transaction.id == bindparam("b_id")).values(
+                merchant=bindparam("b_merchant"),
+                transaction_id=bindparam("b_transaction_id"),
+                category_id=bindparam("b_category_id"),
+            ),
+            kept_updates,
+        )
+    connection.execute(
+        update(Transaction).where(Transaction.id == bindparam("b_id")).values(
+            reconciled_with_id=bindparam("b_kept_id")
+        ),
+        link_updates,
+    )
+
+def reconcile(bind, user_id: int, window_days: int = 3) -> Dict[str, int]:
+    """Reconcile a user's transactions in one write transaction, queued with the import writers"""
+    with ingest_write_lock(ingest_lock_path()), bind.begin() as connection:
+        return reconcile_user(connection, user_id, window_days)
@@ -1,62 +1,100 @@
-import os
-import pandas as pd
+import io
 import csv
 import json
-from typing import List, Dict, Any
+import math
+import numbers
+import re
+import time
+from typing import BinaryIO, List, Dict, Any, Optional
 from datetime import datetime
-from fastapi import UploadFile
+from decimal import Decimal, InvalidOperation
 
 from app.core.config import settings
+from app.core.metrics import observe_parse
 from app.models.transaction import Transaction
+from app.utils.money import to_decimal
+
+# Columns holding the bank's own id for a transaction. The UTR comes first: a
+# UPI payment has the same one in the bank statement and the UPI app's export.
+TRANSACTION_ID_FIELDS = [
+    "utr", "UTR", "UTR No", "UTR No.", "UTR Number", "UPI Ref No",
+    "transaction_id", "Transaction ID", "TransactionID", "Transaction Id", "txn_id", "Txn ID",
+    "Reference Number", "Ref No", "Chq/Ref No",
+]
+
+# Columns stating a row's ISO 4217 currency, for statements that carry one
+CURRENCY_FIELDS = ["currency", "Currency", "CURRENCY", "Currency Code", "CCY"]
+
+# Currency of bank-specific layouts whose exports don't state one
+BANK_CURRENCIES = {"chase": "USD", "bank_of_america": "USD"}
+
+# PDF statements (PhonePe) name the other party as "Paid to X" / "Received from X"
+PDF_COUNTERPARTY = re.compile(r"^(?:Paid to|Received from)\s+", re.IGNORECASE)
+
+# Bump whenever a change alters what parse_* returns for the same file, so the
+# import manifest and the cached parse output of older versions stop matching
+PARSER_VERSION = 5
+
+def preload_parsers():
+    """Import the heavy spreadsheet dependencies now instead of on the first upload
+
+    pandas (and openpyxl behind it) are only needed for Excel files, so they
+    are imported lazily; workers that handle uploads can call this at startup.
+    """
+    import pandas  # noqa: F401
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        # pandas reports the missing engine itself when an .xlsx arrives
+        pass
 
 class TransactionParser:
     """Service to parse bank transactions from different file formats"""
     
-    def __init__(self):
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    
-    async def save_upload_file(self, upload_file: UploadFile) -> str:
-        """Save the uploaded file and return the path"""
-        file_extension = upload_file.filename.split('.')[-1]
-        if file_extension.lower() not in settings.ALLOWED_EXTENSIONS:
+    def file_extension(self, filename: str) -> str:
+        """The lower-cased extension of an upload, if it is an allowed one"""
+        file_extension = filename.split('.')[-1].lower()
+        if file_extension not in settings.ALLOWED_EXTENSIONS:
             raise ValueError(f"File extension {file_extension} not allowed")
-        
-        # Create a unique filename
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"{timestamp}_{upload_file.filename}"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
-        
-        # Save the file
-        with open(file_path, "wb") as f:
-            content = await upload_file.read()
-            f.write(content)
-        
-        return file_path
+        return file_extension
     
     def parse_file(self, file_path: str, bank_type: str = None) -> List[Dict[str, Any]]:
         """Parse the file based on its extension and bank type"""
-        file_extension = file_path.split('.')[-1].lower()
+        with open(file_path, "rb") as f:
+            return self.parse_stream(f, file_path.split('.')[-1].lower(), bank_type)
+    
+    def parse_content(self, content: bytes, file_extension: str, bank_type: str = None) -> List[Dict[str, Any]]:
+        """Parse an upload held in memory"""
+        return self.parse_stream(io.BytesIO(content), file_extension, bank_type)
+    
+    def parse_stream(self, stream: BinaryIO, file_extension: str, bank_type: str = None) -> List[Dict[str, Any]]:
+        """Parse a binary stream in the given format"""
+        started = time.perf_counter()
         
         if file_extension == "csv":
-            return self._parse_csv(file_path, bank_type)
+            transactions = self._parse_csv(stream, bank_type)
         elif file_extension in ["xlsx", "xls"]:
-            return self._parse_excel(file_path, bank_type)
+            transactions = self._parse_excel(stream, bank_type)
         elif file_extension == "json":
-            return self._parse_json(file_path)
+            transactions = self._parse_json(stream)
         elif file_extension == "pdf":
-            return self._parse_pdf(file_path, bank_type)
+            transactions = self._parse_pdf(stream, bank_type)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        observe_parse(file_extension, bank_type, len(transactions), time.perf_counter() - started)
+        return transactions
     
-    def _parse_csv(self, file_path: str, bank_type: str = None) -> List[Dict[str, Any]]:
+    def _parse_csv(self, stream: BinaryIO, bank_type: str = None) -> List[Dict[str, Any]]:
         """Parse CSV file based on bank type"""
         # Read the CSV file
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            # Detect the delimiter by reading the first line
-            dialect = csv.Sniffer().sniff(f.read(1024))
-            f.seek(0)
-            reader = csv.DictReader(f, dialect=dialect)
-            transactions = list(reader)
+        f = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        # Detect the delimiter by reading the first line
+        dialect = csv.Sniffer().sniff(f.read(1024))
+        f.seek(0)
+        reader = csv.DictReader(f, dialect=dialect)
+        transactions = list(reader)
+        f.detach()
         
         # If bank type is specified, apply specific parsing logic
         if bank_type:
@@ -65,10 +103,11 @@ class TransactionParser:
         # Basic mapping for generic CSV format
         return self._map_generic_format(transactions)
     
-    def _parse_excel(self, file_path: str, bank_type: str = None) -> List[Dict[str, Any]]:
+    def _parse_excel(self, stream: BinaryIO, bank_type: str = None) -> List[Dict[str, Any]]:
         """Parse Excel file"""
-        # Read the Excel file
-        df = pd.read_excel(file_path)
+        # Read the Excel file; pandas is imported here so idle workers never load it
+        import pandas as pd
+        df = pd.read_excel(stream)
         transactions = df.to_dict('records')
         
         # Apply bank-specific mapping if needed
@@ -77,10 +116,9 @@ class TransactionParser:
         
         return self._map_generic_format(transactions)
     
-    def _parse_json(self, file_path: str) -> List[Dict[str, Any]]:
+    def _parse_json(self, stream: BinaryIO) -> List[Dict[str, Any]]:
         """Parse JSON file"""
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = json.load(stream)
         
         # Handle different JSON structures
         if isinstance(data, list):
@@ -90,8 +128,55 @@ class TransactionParser:
         else:
             raise ValueError("Unsupported JSON structure")
     
-    def _parse_pdf(self, file_path: str, bank_type: str) -> List[Dict[str, Any]]:
-        raise NotImplementedError("PDF parsing is not implemented yet")
+    def _parse_pdf(self, stream: BinaryIO, bank_type: str) -> List[Dict[str, Any]]:
+        """Parse a PDF statement from one of the sources in pdf_sources.json"""
+        # PyPDF2 is imported here so workers that never see a PDF don't load it
+        from app.services.pdf_parser import PdfDocument, expense_parser
+        parser = expense_parser()
+        
+        with PdfDocument(stream) as document:
+            # bank_type names the source outright; otherwise the first page tells
+            sources = {name.lower(): name for name in parser.source_configs}
+            source = sources.get((bank_type or "").lower()) or parser.detect_source(document)
+            if source not in parser.source_configs:
+                raise ValueError(
+                    f"Unrecognized PDF statement; supported sources: {', '.join(parser.source_configs)}"
+                )
+            records = list(parser.iter_records(document, source))
+        
+        return self._map_pdf_records(records, source, parser.source_configs[source])
+    
+    def _map_pdf_records(
+        self, records: List[Dict[str, Any]], source: str, config: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Map records from the PDF parser to our standard format"""
+        result = []
+        for record in records:
+            # The PDF parser gives debits as negative amounts
+            amount = self._parse_amount(record.get("amount"))
+            if not record.get("date") or not amount:
+                continue
+            description = str(record.get("description") or "").strip()
+            counterparty = PDF_COUNTERPARTY.match(description)
+            
+            std_tx = {
+                "transaction_date": self._parse_date(record["date"]),
+                "amount": -amount,
+                "description": description,
+                "merchant": description[counterparty.end():] if counterparty else "",
+                "is_expense": amount < 0,
+                # The UTR first, so the bank statement's row of the same payment matches it
+                "transaction_id": (
+                    self._parse_transaction_id(record.get("utr_no"))
+                    or self._parse_transaction_id(record.get("transaction_id"))
+                ),
+                # None falls back to DEFAULT_CURRENCY when the row is stored
+                "currency": config.get("currency"),
+                "statement_source": f"pdf:{source.lower()}",
+                "original_data": record
+            }
+            result.append(std_tx)
+        return result
     
     def _map_bank_format(self, transactions: List[Dict[str, Any]], bank_type: str) -> List[Dict[str, Any]]:
         """Map bank-specific formats to our standard format"""
@@ -117,6 +202,8 @@ class TransactionParser:
             merchant_field = self._find_field(
                 tx, ["merchant", "payee", "Merchant", "Payee", "vendor", "Vendor"]
             )
+            id_field = self._find_field(tx, TRANSACTION_ID_FIELDS)
+            currency_field = self._find_field(tx, CURRENCY_FIELDS)
             
             if not date_field or not amount_field:
                 continue  # Skip if essential fields are missing
@@ -128,6 +215,10 @@ class TransactionParser:
                 "description": tx.get(description_field, "") if description_field else "",
                 "merchant": tx.get(merchant_field, "") if merchant_field else "",
                 "is_expense": self._parse_amount(tx.get(amount_field, 0)) > 0,
+                "transaction_id": self._parse_transaction_id(tx.get(id_field)) if id_field else None,
+                # None falls back to DEFAULT_CURRENCY when the row is stored
+                "currency": self._parse_currency(tx.get(currency_field)) if currency_field else None,
+                "statement_source": self._statement_source(tx),
                 "original_data": tx  # Store the original data for reference
             }
             
@@ -145,6 +236,9 @@ class TransactionParser:
                 "description": tx.get("Description", ""),
                 "merchant": "",  # Chase doesn't typically have a separate merchant field
                 "is_expense": self._parse_amount(tx.get("Amount", 0)) > 0,
+                "transaction_id": None,  # Chase exports carry no transaction id
+                "currency": BANK_CURRENCIES["chase"],
+                "statement_source": "chase",
                 "original_data": tx
             }
             result.append(std_tx)
@@ -159,7 +253,7 @@ class TransactionParser:
             description_field = self._find_field(tx, ["Payee", "Description"])
             amount_field = self._find_field(tx, ["Amount", "Withdrawal Amount", "Deposit Amount"])
             
-            amount = 0
+            amount = Decimal(0)
             if "Withdrawal Amount" in tx and tx["Withdrawal Amount"]:
                 amount = -abs(self._parse_amount(tx["Withdrawal Amount"]))
             elif "Deposit Amount" in tx and tx["Deposit Amount"]:
@@ -173,11 +267,23 @@ class TransactionParser:
                 "description": tx.get(description_field, ""),
                 "merchant": "",  # BofA doesn't typically have a separate merchant field
                 "is_expense": amount > 0,
+                "transaction_id": self._parse_transaction_id(tx.get("Reference Number")),
+                "currency": BANK_CURRENCIES["bank_of_america"],
+                "statement_source": "bank_of_america",
                 "original_data": tx
             }
             result.append(std_tx)
         return result
     
+    def _statement_source(self, tx: Dict[str, Any]) -> str:
+        """The kind of statement a row comes from, told apart by its columns
+
+        Every export of one bank (or UPI app) shares a layout, so transaction
+        ids are unique within a source but not across: the bank and PhonePe
+        rows of one UPI payment carry the same UTR.
+        """
+        return "columns:" + ",".join(sorted(str(name) for name in tx))
+    
     def _find_field(self, data: Dict[str, Any], possible_names: List[str]) -> str:
         """Find a field in the data based on possible name variations"""
         for name in possible_names:
@@ -185,6 +291,23 @@ class TransactionParser:
                 return name
         return None
     
+    def _parse_transaction_id(self, value) -> Optional[str]:
+        """The bank's id for a transaction as text, None when the cell is empty"""
+        if value is None or (isinstance(value, float) and not math.isfinite(value)):
+            return None
+        if isinstance(value, float) and value.is_integer():
+            # Numeric ids read from Excel come back as floats
+            value = int(value)
+        value = str(value).strip()
+        return value or None
+    
+    def _parse_currency(self, value) -> Optional[str]:
+        """An ISO 4217 code from a currency cell, None when it doesn't hold one"""
+        if not isinstance(value, str):
+            return None
+        value = value.strip().upper()
+        return value if len(value) == 3 and value.isalpha() else None
+    
     def _parse_date(self, date_str: str) -> datetime:
         """Parse a date string into a datetime object"""
         if not date_str:
@@ -205,22 +328,28 @@ class TransactionParser:
         # If all formats fail, return current date
         return datetime.now()
     
-    def _parse_amount(self, amount) -> float:
-        """Parse an amount value to float"""
-        if isinstance(amount, (int, float)):
-            return float(amount)
+    def _parse_amount(self, amount) -> Decimal:
+        """Parse an amount value to an exact Decimal, straight from its string form"""
+        if isinstance(amount, (numbers.Real, Decimal)) and not isinstance(amount, bool):
+            # Excel cells arrive as numbers; empty ones as NaN
+            value = to_decimal(amount)
+            return value if value.is_finite() else Decimal(0)
         
         if isinstance(amount, str):
             # Remove currency symbols and commas
-            clean_amount = amount.replace("$", "").replace(",", "").replace("£", "").replace("€", "").strip()
+            clean_amount = (
+                amount.replace("$", "").replace(",", "").replace("£", "").replace("€", "").replace("₹", "").strip()
+            )
             
             # Handle negative amounts with parentheses
             if clean_amount.startswith("(") and clean_amount.endswith(")"):
                 clean_amount = "-" + clean_amount[1:-1]
             
             try:
-                return float(clean_amount)
-            except ValueError:
+                value = Decimal(clean_amount)
+                if value.is_finite():
+                    return value
+            except InvalidOperation:
                 pass
         
-        return 0.0 
\ No newline at end of file
+        return Decimal(0) 
\ No newline at end of file
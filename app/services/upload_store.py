@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.partitions import transaction_source
+from app.models.upload import UploadBlob, UploadReference
+
+# Uploaded statements are stored once per distinct content, gzip-compressed, as
+# UPLOAD_DIR/ab/cd/<sha256>.gz. UPLOAD_DIR is outside the public /static mount.
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def blob_path(sha256: str, suffix: str = "") -> str:
+    """Where a blob is stored; files derived from it (suffix) sit next to it and share its lifetime"""
+    return os.path.join(settings.UPLOAD_DIR, sha256[:2], sha256[2:4], f"{sha256}{suffix}.gz")
+
+def write_blob(content: bytes, sha256: str = None) -> Tuple[str, int]:
+    """Store content unless an identical blob exists; returns (sha256, stored size)"""
+    sha256 = sha256 or content_hash(content)
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        # A fresh mtime keeps sweep_blob_files() away while the new reference commits
+        os.utime(path)
+        return sha256, os.path.getsize(path)
+
+    write_compressed(path, content)
+    return sha256, os.path.getsize(path)
+
+def write_compressed(path: str, content: bytes):
+    """Gzip content to path through a temporary file, so a crash never leaves a truncated file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(gzip.compress(content, compresslevel=settings.UPLOAD_COMPRESS_LEVEL, mtime=0))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def read_blob(sha256: str) -> bytes:
+    with gzip.open(blob_path(sha256), "rb") as f:
+        return f.read()
+
+async def store_upload(
+    db: AsyncSession, user_id: int, filename: str, content: bytes, sha256: str = None
+) -> UploadReference:
+    """Store an uploaded file and record that this user uploaded it"""
+    sha256, stored_size = await run_in_threadpool(write_blob, content, sha256)
+
+    # Bumping last_used_at keeps a concurrent collect_garbage() off this blob
+    await db.execute(
+        insert(UploadBlob)
+        .values(sha256=sha256, size=len(content), stored_size=stored_size)
+        .on_conflict_do_update(index_elements=["sha256"], set_={"last_used_at": func.now()})
+    )
+    reference = UploadReference(user_id=user_id, blob_sha256=sha256, filename=filename)
+    db.add(reference)
+    await db.commit()
+    return reference
+
+def collect_garbage(connection, retention_days: int, grace_seconds: int) -> Dict[str, int]:
+    """Delete unused upload references and the blob rows nothing references any more
+
+    An upload is unused once none of its transactions remain (in the hot table
+    or any archive) and it is older than retention_days. Blobs are only dropped
+    after grace_seconds without an upload. Commit before sweep_blob_files().
+    """
+    now = datetime.utcnow()
+
+    transactions = transaction_source(connection)
+    unused = connection.execute(delete(UploadReference).where(
+        UploadReference.created_at < now - timedelta(days=retention_days),
+        ~exists().where(transactions.upload_id == UploadReference.id),
+    ))
+
+    unreferenced = select(UploadBlob.sha256).where(
+        UploadBlob.last_used_at < now - timedelta(seconds=grace_seconds),
+        ~exists().where(UploadReference.blob_sha256 == UploadBlob.sha256),
+    )
+    bytes_freed = connection.execute(
+        select(func.coalesce(func.sum(UploadBlob.stored_size), 0)).where(UploadBlob.sha256.in_(unreferenced))
+    ).scalar()
+    blobs = connection.execute(delete(UploadBlob).where(UploadBlob.sha256.in_(unreferenced)))
+    return {"references": unused.rowcount, "blobs": blobs.rowcount, "bytes": bytes_freed}
+
+def sweep_blob_files(connection, grace_seconds: int, dry_run: bool = False) -> int:
+    """Remove files without a blob row: collected blobs and leftovers of interrupted writes"""
+    known = set(connection.execute(select(UploadBlob.sha256)).scalars())
+    removed = 0
+    for directory, _, filenames in os.walk(settings.UPLOAD_DIR):
+        for name in filenames:
+            path = os.path.join(directory, name)
+            if name.endswith(".gz") and name.split(".", 1)[0] in known:
+                continue
+            try:
+                # Skip files an upload may be writing right now
+                if time.time() - os.path.getmtime(path) < grace_seconds:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+    return removed
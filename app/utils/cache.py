@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.metrics import cache_counters
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after a time to live
+
+    Bounded to `maxsize` entries; the least recently used entry is evicted
+    first. A ttl of 0 or less disables caching. Named caches also report
+    their hits and misses to /metrics.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 10000, name: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter, self._miss_counter = cache_counters(name) if name else (None, None)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                if self._miss_counter is not None:
+                    self._miss_counter.inc()
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self._hit_counter is not None:
+                self._hit_counter.inc()
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,54 @@
+import numbers
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Union
+
+from app.core.config import settings
+
+# Digits after the decimal point for each ISO 4217 currency we expect to see.
+# Anything not listed uses 2.
+CURRENCY_EXPONENTS = {
+    "INR": 2, "USD": 2, "EUR": 2, "GBP": 2, "AED": 2, "SGD": 2,
+    "JPY": 0, "KRW": 0,
+    "BHD": 3, "KWD": 3, "OMR": 3,
+}
+
+def currency_exponent(currency: str = None) -> int:
+    """Number of minor-unit digits for a currency"""
+    return CURRENCY_EXPONENTS.get((currency or settings.DEFAULT_CURRENCY).upper(), 2)
+
+def to_decimal(value: Union[str, int, float, Decimal]) -> Decimal:
+    """Convert a value to Decimal without going through binary float arithmetic
+
+    Floats are converted via their shortest repr, so 0.1 becomes Decimal('0.1').
+    """
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, numbers.Integral):
+        return Decimal(int(value))
+    if isinstance(value, numbers.Real):
+        # Also covers NumPy scalars coming out of pandas
+        return Decimal(repr(float(value)))
+    return Decimal(value)
+
+def to_minor_units(value: Union[str, int, float, Decimal], currency: str = None) -> int:
+    """Convert a major-unit amount (e.g. 120.50 rupees) to integer minor units (12050 paise)
+
+    Amounts with more precision than the currency allows are rounded half-up.
+    """
+    try:
+        amount = to_decimal(value)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return int(amount.scaleb(currency_exponent(currency)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def from_minor_units(minor: int, currency: str = None) -> Decimal:
+    """Convert integer minor units back to an exact major-unit Decimal"""
+    return Decimal(int(minor or 0)).scaleb(-currency_exponent(currency))
+
+def minor_to_float(minor: int, currency: str = None) -> float:
+    """Minor units as a float for JSON output; exact for any realistic amount"""
+    # int / int is correctly rounded, so this equals float(from_minor_units(...))
+    # without building a Decimal for every row
+    return int(minor or 0) / 10 ** currency_exponent(currency)
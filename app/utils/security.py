@@ -1,7 +1,40 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+# Password hashing context. Pinning min and max rounds to the configured cost
+# makes hashes of any other cost "need update", so they are rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+# bcrypt is deliberately slow, so it runs on its own small pool instead of the
+# event loop or the shared threadpool. Slots cover running plus queued jobs.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_LIMIT)
+
+async def _run_bounded(fn, *args):
+    """Run fn on the password pool, or raise PasswordHasherBusy if the queue is full"""
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    # The slot is held until the job finishes, even if the caller goes away
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _slots.release())
+    return await asyncio.wrap_future(future)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -9,4 +42,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Generate a password hash"""
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the event loop
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses an
+    outdated cost and should be replaced.
+    """
+    return await _run_bounded(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash off the event loop"""
+    return await _run_bounded(pwd_context.hash, password)
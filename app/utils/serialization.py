@@ -0,0 +1,108 @@
+import gzip
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.schemas.transaction import TransactionResponse
+from app.utils.money import minor_to_float
+
+# Fields of TransactionResponse in output order
+TRANSACTION_FIELDS = tuple(TransactionResponse.model_fields)
+
+# Database columns behind those fields; amount is stored as integer minor units
+TRANSACTION_COLUMNS = tuple("amount_minor" if name == "amount" else name for name in TRANSACTION_FIELDS)
+
+# Encodings the list, export and report endpoints can answer with. The
+# columnar layout sends one array per field instead of one object per row.
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.spendwise.columnar+json"
+
+# OpenAPI entry for endpoints that go through negotiated_response()
+NEGOTIATED_RESPONSES = {200: {"content": {COLUMNAR_MEDIA_TYPE: {}}}}
+
+# Payloads built from our own tables are already typed by SQLAlchemy, so they
+# skip model validation and go straight to pydantic-core's JSON encoder
+_json_adapter = TypeAdapter(Any)
+
+def transaction_columns(source) -> list:
+    """The columns of a Transaction entity (or partition alias) that a response needs"""
+    return [getattr(source, name) for name in TRANSACTION_COLUMNS]
+
+def transaction_rows(result: Iterable) -> List[Dict[str, Any]]:
+    """Turn rows selected with transaction_columns() into TransactionResponse-shaped dicts"""
+    rows = []
+    for row in result:
+        values = dict(zip(TRANSACTION_FIELDS, row))
+        values["amount"] = minor_to_float(values["amount"], values["currency"])
+        rows.append(values)
+    return rows
+
+def dump_json(data: Any) -> bytes:
+    """Serialize trusted data to JSON in one call"""
+    return _json_adapter.dump_json(data)
+
+def to_columnar(data: Any, fields: Optional[Sequence[str]] = None) -> Any:
+    """Column-oriented copy of data: each list of row dicts becomes one array per field
+
+    Lists nested in a dict (as in the report payloads) are converted too. Rows
+    missing a field get null in that column.
+    """
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    if isinstance(data, list) and (data or fields) and all(isinstance(row, dict) for row in data):
+        if fields is None:
+            fields = list(dict.fromkeys(key for row in data for key in row))
+        return {field: [row.get(field) for row in data] for field in fields}
+    return data
+
+def _quality(header: Optional[str]) -> Dict[str, float]:
+    """Map each media range or coding in an Accept-style header to its q value"""
+    qualities = {}
+    for part in (header or "").split(","):
+        name, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = q
+    return qualities
+
+def preferred_media_type(accept: Optional[str]) -> str:
+    """JSON unless the client asks for the columnar layout at least as strongly"""
+    qualities = _quality(accept)
+    columnar = qualities.get(COLUMNAR_MEDIA_TYPE, 0.0)
+    json_q = next(
+        (qualities[name] for name in (JSON_MEDIA_TYPE, "application/*", "*/*") if name in qualities),
+        0.0
+    )
+    return COLUMNAR_MEDIA_TYPE if columnar > 0 and columnar >= json_q else JSON_MEDIA_TYPE
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    qualities = _quality(accept_encoding)
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+def encoded_response(request: Request, body: bytes, media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """Wrap serialized JSON, gzipping it when it is large and the client accepts gzip"""
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= settings.RESPONSE_GZIP_MIN_BYTES and accepts_gzip(request.headers.get("accept-encoding")):
+        body = gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def negotiated_response(request: Request, data: Any, fields: Optional[Sequence[str]] = None) -> Response:
+    """Serialize data as JSON or the columnar layout, depending on the Accept header
+
+    This bypasses FastAPI's response_model pass, so only use it for data built
+    by our own code.
+    """
+    media_type = preferred_media_type(request.headers.get("accept"))
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        data = to_columnar(data, fields)
+    return encoded_response(request, dump_json(data), media_type)
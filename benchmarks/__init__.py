@@ -0,0 +1,8 @@
+"""
+Reproducible performance benchmarks for SpendWise.
+
+- benchmarks.synthetic: seeded generator for multi-user datasets and statement files
+- benchmarks.run: runs the suites and writes JSON results
+- benchmarks.loadtest: mixed-workload HTTP load generator, in-process or against uvicorn
+- benchmarks.compare: diffs two result files and flags regressions
+"""
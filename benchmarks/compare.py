@@ -0,0 +1,51 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Compares p50 latency of every result present in both runs (and
+rows_per_second where reported). Exits with status 1 when any result got
+slower than the threshold, so it can gate CI.
+
+Usage: python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 10]
+"""
+
+import argparse
+import json
+import sys
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    """Yield (name, metric, before, after, change %, regressed) for shared results"""
+    for name in sorted(set(baseline["results"]) & set(candidate["results"])):
+        before, after = baseline["results"][name], candidate["results"][name]
+        if "p50" in before and "p50" in after and before["p50"]:
+            change = (after["p50"] - before["p50"]) / before["p50"] * 100
+            yield name, "p50 ms", before["p50"], after["p50"], change, change > threshold
+        elif before.get("rows_per_second") and after.get("rows_per_second"):
+            # Throughput: lower is worse
+            change = (after["rows_per_second"] - before["rows_per_second"]) / before["rows_per_second"] * 100
+            yield name, "rows/s", before["rows_per_second"], after["rows_per_second"], change, -change > threshold
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    if baseline["meta"].get("parameters", {}).get("rows") != candidate["meta"].get("parameters", {}).get("rows"):
+        print("warning: runs used different dataset sizes", file=sys.stderr)
+
+    regressions = 0
+    for name, metric, before, after, change, regressed in compare(baseline, candidate, args.threshold):
+        regressions += regressed
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:32} {metric:7} {before:12,.2f} -> {after:12,.2f}  {change:+7.1f}%  {flag}")
+    print(f"{regressions} regression(s) over {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
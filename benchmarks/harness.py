@@ -0,0 +1,144 @@
+"""
+Shared plumbing for the benchmark suites and the load generator: pointing the
+app at a throwaway database, timing helpers and the JSON results format.
+
+Settings are read when app modules are first imported, so call
+configure_environment() before importing anything from app or main.
+"""
+
+import contextlib
+import json
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+BENCHMARK_PASSWORD = "benchmark-password"
+SUITES = ("parse", "ingest", "list", "reports", "auth")
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+def configure_environment(workdir: str, database: Optional[str] = None, **overrides: Any) -> str:
+    """Point settings at a database and upload dir under workdir; returns the database URL"""
+    database = database or os.path.join(workdir, "benchmark.db")
+    url = f"sqlite:///{database}"
+    os.environ.update({
+        "DATABASE_URL": url,
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "LOG_LEVEL": "WARNING",
+        # Profiling middleware would be measured along with the app
+        "SQL_PROFILING": "False",
+    })
+    os.environ.update({name: str(value) for name, value in overrides.items()})
+    return url
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(fraction * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+def summarize(timings: List[float], **extra: Any) -> Dict[str, Any]:
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    values = sorted(t * 1000 for t in timings)
+    return {
+        "unit": "ms",
+        "runs": len(values),
+        "mean": round(statistics.fmean(values), 3) if values else 0.0,
+        "min": round(values[0], 3) if values else 0.0,
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(values[-1], 3) if values else 0.0,
+        **extra,
+    }
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1, **extra: Any) -> Dict[str, Any]:
+    """Run fn warmup + repeat times and summarize the timed runs"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, **extra)
+
+async def measure_async(fn, repeat: int, warmup: int = 1, **extra: Any) -> Dict[str, Any]:
+    """measure() for a coroutine function"""
+    for _ in range(warmup):
+        await fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, **extra)
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_metadata(**parameters: Any) -> Dict[str, Any]:
+    """What a result file needs to be compared with another run"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+    }
+
+def write_results(document: Dict[str, Any], path: Optional[str] = None, prefix: str = "benchmark") -> str:
+    """Write a results document as JSON; defaults to benchmarks/results/<prefix>-<timestamp>.json"""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{prefix}-{stamp}.json")
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+@contextlib.asynccontextmanager
+async def app_client(base_url: Optional[str] = None, timeout: float = 60.0):
+    """An httpx client for the app: in-process over ASGI, or a running server at base_url"""
+    import httpx
+
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+            yield client
+        return
+
+    from main import app, close_database_connections
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            yield client
+    finally:
+        # ASGITransport doesn't run lifespan events, so release the pools ourselves
+        await close_database_connections()
+
+async def login(client, email: str, password: str = BENCHMARK_PASSWORD) -> Dict[str, str]:
+    """Authorization header for a user"""
+    response = await client.post("/api/users/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,219 @@
+"""
+End-to-end load generator with a mixed workload.
+
+Virtual users log in, fan out the dashboard's report requests, page through
+transactions and upload statements, for a fixed duration. Runs against the
+app in-process over httpx's ASGI transport (default), against a local uvicorn
+it starts itself (--serve), or against any running server (--base-url).
+Reports p50/p95/p99 latency and throughput per route and writes JSON results.
+
+Usage: python -m benchmarks.loadtest [--concurrency 20] [--duration 30]
+                                     [--rows 50000] [--users 20]
+                                     [--serve [--workers 4]] [--base-url URL]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.harness import (
+    BENCHMARK_PASSWORD, PROJECT_ROOT, app_client, configure_environment, run_metadata, summarize, write_results
+)
+
+# Relative frequency of each virtual-user action
+WORKLOAD = {"dashboard": 4, "paging": 4, "login": 1, "upload": 1}
+
+class LoadStats:
+    """Latencies and status codes per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, route: str, seconds: float, status):
+        self.latencies[route].append(seconds)
+        self.statuses[route][str(status)] += 1
+
+    async def request(self, client, method: str, route: str, **kwargs):
+        """Issue a request, recording it under its route template"""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, kwargs.pop("url", route), **kwargs)
+        except Exception as e:
+            self.record(f"{method} {route}", time.perf_counter() - started, type(e).__name__)
+            return None
+        self.record(f"{method} {route}", time.perf_counter() - started, response.status_code)
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        return {
+            route: summarize(
+                timings,
+                requests=len(timings),
+                throughput_rps=round(len(timings) / elapsed, 2),
+                statuses=dict(self.statuses[route]),
+            )
+            for route, timings in sorted(self.latencies.items())
+        }
+
+async def virtual_user(
+    client, stats: LoadStats, email: str, next_statement: Callable[[], bytes], year: int, deadline: float, seed: int
+):
+    rng = random.Random(seed)
+    actions, weights = zip(*WORKLOAD.items())
+
+    response = await stats.request(
+        client, "POST", "/api/users/token", data={"username": email, "password": BENCHMARK_PASSWORD}
+    )
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    while time.perf_counter() < deadline:
+        action = rng.choices(actions, weights)[0]
+        if action == "login":
+            await stats.request(
+                client, "POST", "/api/users/token", data={"username": email, "password": BENCHMARK_PASSWORD}
+            )
+        elif action == "dashboard":
+            # The dashboard issues these together on load
+            started = time.perf_counter()
+            await asyncio.gather(
+                stats.request(client, "GET", "/api/reports/summary", headers=headers),
+                stats.request(client, "GET", "/api/reports/monthly", headers=headers, params={"year": year}),
+                stats.request(client, "GET", "/api/reports/category-comparison", headers=headers),
+                stats.request(client, "GET", "/api/transactions/", headers=headers, params={"limit": 20}),
+            )
+            stats.record("dashboard (fan-out)", time.perf_counter() - started, "ok")
+        elif action == "paging":
+            for page in range(rng.randint(1, 5)):
+                await stats.request(
+                    client, "GET", "/api/transactions/", headers=headers,
+                    params={"limit": 50, "skip": page * 50},
+                )
+        elif action == "upload":
+            await stats.request(
+                client, "POST", "/api/transactions/upload", headers=headers,
+                files={"file": (f"statement_{rng.randint(0, 10 ** 9)}.csv", next_statement(), "text/csv")},
+            )
+
+async def run_load(
+    args, emails: List[str], next_statement: Callable[[], bytes], year: int, base_url: Optional[str]
+) -> Dict[str, dict]:
+    stats = LoadStats()
+    async with app_client(base_url) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, stats, emails[i % len(emails)], next_statement, year, deadline, args.seed + i)
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return stats.summary(elapsed)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int) -> (subprocess.Popen, str):
+    """Start uvicorn on a free local port with the current (benchmark) environment"""
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/metrics").status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+def print_table(results: Dict[str, dict]):
+    width = max(len(route) for route in results)
+    print(f"{'route':{width}} {'reqs':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}  statuses")
+    for route, summary in results.items():
+        print(
+            f"{route:{width}} {summary['requests']:7} {summary['throughput_rps']:8.1f} "
+            f"{summary['p50']:7.1f}ms {summary['p95']:7.1f}ms {summary['p99']:7.1f}ms  {summary['statuses']}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--rows", type=int, default=50_000, help="synthetic transactions to preload")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--upload-rows", type=int, default=200, help="rows per uploaded statement")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--serve", action="store_true", help="start a local uvicorn instead of running in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--base-url", help="target an already running server (users must exist with the benchmark password)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/loadtest-<time>.json)")
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import SyntheticDataset
+
+    dataset = SyntheticDataset(seed=args.seed, users=args.users, rows=args.rows)
+    emails = [user["email"] for user in dataset.users()]
+    # The dashboard asks for the last year the dataset covers
+    year = dataset.end.year
+
+    # Each upload gets its own rows, or the import manifest would answer every
+    # upload after the first without parsing it. Against a running server the
+    # sequence starts from the clock, so repeated runs don't reupload old files.
+    uploads = itertools.count(int(time.time()) if args.base_url else 1)
+
+    def next_statement() -> bytes:
+        rows = dataset.statement_rows(args.upload_rows, user_index=next(uploads))
+        return ("date,amount,description,merchant\n" + "".join(
+            f"{row['date']},{row['amount']},{row['description']},{row['merchant']}\n" for row in rows
+        )).encode()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = None
+        base_url = args.base_url
+        if not base_url:
+            configure_environment(workdir, BCRYPT_ROUNDS=args.bcrypt_rounds)
+            # Imported only now, so app settings see the benchmark environment
+            from benchmarks.suites import load_dataset
+            load_dataset(dataset)
+            if args.serve:
+                server, base_url = start_server(args.workers)
+        try:
+            results = asyncio.run(run_load(args, emails, next_statement, year, base_url))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    mode = "base-url" if args.base_url else f"uvicorn x{args.workers}" if args.serve else "in-process"
+    print(f"{args.concurrency} virtual users for {args.duration:g}s ({mode})")
+    print_table(results)
+    path = write_results(
+        {"meta": run_metadata(mode=mode, **vars(args)), "results": results}, args.output, prefix="loadtest"
+    )
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
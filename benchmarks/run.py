@@ -0,0 +1,48 @@
+"""
+Run the benchmark suites against a freshly generated synthetic dataset.
+
+Builds a throwaway SQLite database, bulk-loads a seeded multi-user dataset,
+runs the selected suites (parsing, ingest, list pagination, reports, auth)
+and writes the results as JSON for comparison with benchmarks.compare.
+
+Usage: python -m benchmarks.run [--rows 100000] [--users 20] [--seed 42]
+                                [--suites parse ingest list reports auth]
+                                [--repeat 20] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from benchmarks.harness import SUITES, configure_environment, run_metadata, write_results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="transactions in the dataset (1k to 10M)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--suites", nargs="+", default=list(SUITES), choices=SUITES)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per measurement")
+    parser.add_argument("--auth-repeat", type=int, default=5, help="timed logins (bcrypt is slow on purpose)")
+    parser.add_argument("--statement-rows", type=int, default=5000, help="rows per parsed/ingested statement")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/benchmark-<time>.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(workdir, BCRYPT_ROUNDS=args.bcrypt_rounds)
+        # Imported only now, so app settings see the benchmark environment
+        from benchmarks.suites import run_suites
+        results = asyncio.run(run_suites(args, workdir))
+
+    path = write_results({"meta": run_metadata(**vars(args)), "results": results}, args.output)
+    width = max(len(name) for name in results)
+    for name, summary in results.items():
+        if summary["unit"] == "ms":
+            print(f"{name:{width}}  p50={summary['p50']:9.2f}ms  p95={summary['p95']:9.2f}ms  p99={summary['p99']:9.2f}ms")
+        else:
+            print(f"{name:{width}}  {summary['seconds']:9.2f}s  {summary['rows_per_second']:,.0f} rows/s")
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark suites. Each suite returns {result name: summary} for the run's
+results document.
+
+Imports app modules at the top, so only import this module after
+harness.configure_environment() has pointed settings at the benchmark database.
+"""
+
+import os
+import time
+from datetime import timedelta
+from typing import Any, Dict, Tuple
+
+from benchmarks.harness import BENCHMARK_PASSWORD, app_client, login, measure, measure_async
+from benchmarks.synthetic import STATEMENT_FORMATS, SyntheticDataset, bulk_load, write_statement
+
+import init_db
+from app.db.database import engine
+from app.services.ingest import ingest_coordinator, transaction_insert_rows
+from app.services.transaction_parser import TransactionParser
+from app.utils.security import get_password_hash
+
+def load_dataset(dataset: SyntheticDataset) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """Create the schema and bulk-load the dataset; the load itself is reported too"""
+    init_db.init_db()
+    started = time.perf_counter()
+    user_ids = bulk_load(engine, dataset, get_password_hash(BENCHMARK_PASSWORD))
+    elapsed = time.perf_counter() - started
+    return user_ids, {
+        "unit": "s",
+        "runs": 1,
+        "seconds": round(elapsed, 3),
+        "rows": dataset.rows,
+        "users": dataset.user_count,
+        "rows_per_second": round(dataset.rows / elapsed, 1),
+    }
+
+def parse_suite(dataset: SyntheticDataset, workdir: str, rows: int, repeat: int) -> Dict[str, Any]:
+    """TransactionParser.parse_file on statement files of each supported format"""
+    parser = TransactionParser()
+    statement = dataset.statement_rows(rows)
+    results = {}
+    for file_format in STATEMENT_FORMATS:
+        path = write_statement(os.path.join(workdir, f"statement.{file_format}"), statement)
+        summary = measure(lambda: parser.parse_file(path), repeat, rows=rows, bytes=os.path.getsize(path))
+        summary["rows_per_second"] = round(rows / (summary["p50"] / 1000), 1)
+        results[f"parse.{file_format}"] = summary
+    return results
+
+def ingest_suite(dataset: SyntheticDataset, user_id: int, rows: int, repeat: int) -> Dict[str, Any]:
+    """Parsed statement rows through the single-writer ingest coordinator
+
+    ingest.batch imports new statements; ingest.reimport submits one of them
+    again, so every row is skipped as already imported.
+    """
+    # Distinct synthetic users' histories, so no statement overlaps another
+    statements = iter([
+        transaction_insert_rows(user_id, dataset.transactions(10_000 + run, rows), "benchmark.csv")
+        for run in range(repeat)
+    ])
+    summary = measure(lambda: ingest_coordinator.submit(next(statements)).result(), repeat, warmup=0, rows=rows)
+    summary["rows_per_second"] = round(rows / (summary["p50"] / 1000), 1)
+
+    imported = transaction_insert_rows(user_id, dataset.transactions(10_000, rows), "benchmark.csv")
+    reimport = measure(lambda: ingest_coordinator.submit(imported).result(), repeat, warmup=0, rows=rows)
+    reimport["rows_per_second"] = round(rows / (reimport["p50"] / 1000), 1)
+    return {"ingest.batch": summary, "ingest.reimport": reimport}
+
+async def list_suite(client, headers, dataset: SyntheticDataset, repeat: int) -> Dict[str, Any]:
+    """Transaction listing: first page, a deep page, a large page and a one-year export"""
+    user_rows = dataset.rows_per_user[dataset.heaviest_user()]
+    year = dataset.end.year
+    requests = {
+        "list.first_page": ("/api/transactions/", {"limit": 100}),
+        "list.deep_page": ("/api/transactions/", {"limit": 100, "skip": max(0, user_rows - 100)}),
+        "list.page_1000": ("/api/transactions/", {"limit": 1000}),
+        "list.export_year": (
+            "/api/transactions/export", {"start_date": f"{year}-01-01", "end_date": f"{year}-12-31T23:59:59"}
+        ),
+    }
+    return await _endpoint_results(client, headers, requests, repeat)
+
+async def reports_suite(client, headers, dataset: SyntheticDataset, repeat: int) -> Dict[str, Any]:
+    """Each report endpoint over the most recent stretch of the dataset"""
+    end = dataset.end
+    requests = {
+        "reports.summary": (
+            "/api/reports/summary",
+            {"start_date": (end - timedelta(days=365)).isoformat(), "end_date": end.isoformat()},
+        ),
+        "reports.monthly_year": ("/api/reports/monthly", {"year": end.year}),
+        "reports.monthly_month": ("/api/reports/monthly", {"year": end.year, "month": end.month}),
+        "reports.category_comparison": (
+            "/api/reports/category-comparison",
+            {"start_date": (end - timedelta(days=90)).isoformat(), "end_date": end.isoformat()},
+        ),
+    }
+    return await _endpoint_results(client, headers, requests, repeat)
+
+async def auth_suite(client, email: str, headers, repeat: int) -> Dict[str, Any]:
+    """Password login (bcrypt) and token-authenticated /me"""
+    return {
+        "auth.login": await measure_async(lambda: login(client, email), repeat),
+        "auth.me": await measure_async(lambda: _get(client, "/api/users/me", headers), repeat),
+    }
+
+async def _get(client, path: str, headers, params=None):
+    response = await client.get(path, headers=headers, params=params)
+    response.raise_for_status()
+    return response
+
+async def _endpoint_results(client, headers, requests, repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name, (path, params) in requests.items():
+        response = await _get(client, path, headers, params)
+        results[name] = await measure_async(
+            lambda: _get(client, path, headers, params), repeat, warmup=0, bytes=len(response.content)
+        )
+    return results
+
+async def run_suites(args, workdir: str) -> Dict[str, Any]:
+    """Load the dataset, then run the selected suites against it"""
+    dataset = SyntheticDataset(seed=args.seed, users=args.users, rows=args.rows)
+    user_ids, load_summary = load_dataset(dataset)
+    results = {"load": load_summary}
+    heavy_email = dataset.users()[dataset.heaviest_user()]["email"]
+
+    async with app_client() as client:
+        headers = await login(client, heavy_email)
+        if "list" in args.suites:
+            results.update(await list_suite(client, headers, dataset, args.repeat))
+        if "reports" in args.suites:
+            results.update(await reports_suite(client, headers, dataset, args.repeat))
+        if "auth" in args.suites:
+            results.update(await auth_suite(client, heavy_email, headers, args.auth_repeat))
+
+    # These write to the database, so they run after the read-side suites
+    if "parse" in args.suites:
+        results.update(parse_suite(dataset, workdir, args.statement_rows, args.repeat))
+    if "ingest" in args.suites:
+        results.update(ingest_suite(dataset, user_ids[heavy_email], args.statement_rows, args.repeat))
+    ingest_coordinator.stop()
+    return results
@@ -0,0 +1,220 @@
+"""
+Seeded synthetic data for benchmarks.
+
+Generates realistic multi-user transaction histories: merchants follow a
+Zipf-like popularity curve, amounts are log-normal around a typical value for
+each merchant, and every user has a monthly salary credit and rent debit.
+The same seed always produces the same data.
+"""
+
+import csv
+import json
+import math
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+# merchant, category (as created by init_db), typical amount in INR, log-normal spread
+MERCHANT_CATALOG = [
+    ("Swiggy", "Food & Dining", 380, 0.55),
+    ("Zomato", "Food & Dining", 420, 0.55),
+    ("Amazon Pay", "Shopping", 1450, 0.9),
+    ("Uber India", "Transportation", 260, 0.5),
+    ("BigBasket", "Food & Dining", 1900, 0.6),
+    ("Flipkart", "Shopping", 2100, 0.9),
+    ("Ola Cabs", "Transportation", 240, 0.5),
+    ("Chai Point", "Food & Dining", 120, 0.4),
+    ("Indian Oil", "Transportation", 1800, 0.35),
+    ("DMart", "Shopping", 2400, 0.6),
+    ("Airtel Recharge", "Housing", 599, 0.2),
+    ("BookMyShow", "Entertainment", 650, 0.5),
+    ("Reliance Fresh", "Food & Dining", 900, 0.6),
+    ("Myntra", "Shopping", 1700, 0.7),
+    ("Netflix", "Entertainment", 649, 0.05),
+    ("Apollo Pharmacy", "Health", 700, 0.7),
+    ("IRCTC", "Travel", 1600, 0.8),
+    ("Tata Power", "Housing", 2300, 0.4),
+    ("Barbeque Nation", "Food & Dining", 2200, 0.4),
+    ("Cult.fit", "Health", 1500, 0.3),
+    ("Udemy", "Education", 499, 0.4),
+    ("MakeMyTrip", "Travel", 7800, 0.9),
+    ("Decathlon", "Shopping", 2600, 0.7),
+    ("Hotstar", "Entertainment", 299, 0.05),
+]
+ZIPF_EXPONENT = 1.1
+
+DESCRIPTION_FORMATS = [
+    "UPI/P2M/{ref}/{merchant}",
+    "UPI-{merchant}-{ref}@ybl",
+    "POS {ref} {merchant} {city}",
+    "{merchant} ONLINE PAYMENT REF {ref}",
+]
+CITIES = ["MUMBAI", "BENGALURU", "DELHI", "PUNE", "CHENNAI", "HYDERABAD", "KOLKATA"]
+EMPLOYERS = ["ACME TECHNOLOGIES", "GLOBEX INDIA", "INITECH SOLUTIONS", "UMBRELLA LABS"]
+
+STATEMENT_FORMATS = ("csv", "xlsx", "json")
+
+class SyntheticDataset:
+    """A reproducible set of users and their transaction histories"""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        users: int = 10,
+        rows: int = 10000,
+        start: datetime = datetime(2021, 1, 1),
+        end: datetime = datetime(2024, 12, 31),
+    ):
+        self.seed = seed
+        self.user_count = users
+        self.rows = rows
+        self.start = start
+        self.end = end
+        self._weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(MERCHANT_CATALOG))]
+
+        # Activity is skewed too: a few heavy users own much of the history
+        rng = random.Random(f"{seed}:users")
+        activity = [rng.lognormvariate(0, 0.8) for _ in range(users)]
+        total = sum(activity)
+        self.rows_per_user = [int(rows * share / total) for share in activity]
+        self.rows_per_user[0] += rows - sum(self.rows_per_user)
+
+    def users(self) -> List[Dict[str, str]]:
+        return [
+            {"email": f"user{index}@bench.example.com", "full_name": f"Benchmark User {index}"}
+            for index in range(self.user_count)
+        ]
+
+    def heaviest_user(self) -> int:
+        """Index of the user with the most transactions"""
+        return max(range(self.user_count), key=self.rows_per_user.__getitem__)
+
+    def transactions(self, user_index: int, count: Optional[int] = None) -> Iterator[dict]:
+        """Transactions for one user in date order, as plain values
+
+        Each dict has transaction_date, amount (a positive float in INR),
+        description, merchant, category and is_expense.
+        """
+        count = self.rows_per_user[user_index] if count is None else count
+        rng = random.Random(f"{self.seed}:user:{user_index}")
+        span_seconds = (self.end - self.start).total_seconds()
+        employer = rng.choice(EMPLOYERS)
+        salary = round(rng.lognormvariate(math.log(85000), 0.4), -2)
+        rent = round(salary * rng.uniform(0.2, 0.35), -2)
+
+        # Recurring entries take two rows a month; everything else is card/UPI spend
+        months = max(1, int(span_seconds // (30 * 86400)))
+        recurring = min(count // 10, months * 2)
+        offsets = sorted(rng.random() * span_seconds for _ in range(count - recurring))
+        events = [(offset, None) for offset in offsets]
+        for month in range(recurring // 2):
+            events.append((month * 30 * 86400, "salary"))
+            events.append((month * 30 * 86400 + 4 * 86400, "rent"))
+        events.sort(key=lambda event: event[0])
+
+        for offset, kind in events:
+            when = self.start + timedelta(seconds=int(offset))
+            ref = rng.randint(10 ** 11, 10 ** 12 - 1)
+            if kind == "salary":
+                yield {
+                    "transaction_date": when, "amount": salary, "merchant": employer,
+                    "description": f"NEFT/SALARY/{employer}/{ref}", "category": "Income", "is_expense": False,
+                }
+            elif kind == "rent":
+                yield {
+                    "transaction_date": when, "amount": rent, "merchant": "Rent Payment",
+                    "description": f"IMPS/RENT/{ref}", "category": "Housing", "is_expense": True,
+                }
+            else:
+                merchant, category, typical, spread = rng.choices(MERCHANT_CATALOG, self._weights)[0]
+                amount = round(max(1.0, rng.lognormvariate(math.log(typical), spread)), 2)
+                description = rng.choice(DESCRIPTION_FORMATS).format(
+                    ref=ref, merchant=merchant.upper(), city=rng.choice(CITIES)
+                )
+                yield {
+                    "transaction_date": when, "amount": amount, "merchant": merchant,
+                    "description": description, "category": category, "is_expense": True,
+                }
+
+    def statement_rows(self, count: int, user_index: int = 0) -> List[Dict[str, str]]:
+        """Rows of a generic bank statement, in the column layout TransactionParser maps"""
+        return [
+            {
+                "date": tx["transaction_date"].strftime("%Y-%m-%d"),
+                # Generic statements carry expenses as positive and credits as negative amounts
+                "amount": f"{tx['amount'] if tx['is_expense'] else -tx['amount']:.2f}",
+                "description": tx["description"],
+                "merchant": tx["merchant"],
+            }
+            for tx in self.transactions(user_index, count)
+        ]
+
+def write_statement(path: str, rows: List[Dict[str, str]]) -> str:
+    """Write statement rows as CSV, XLSX or JSON, chosen by the file extension"""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    elif extension == "xlsx":
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(rows[0]))
+        for row in rows:
+            sheet.append(list(row.values()))
+        workbook.save(path)
+    elif extension == "json":
+        with open(path, "w") as f:
+            json.dump({"transactions": rows}, f)
+    else:
+        raise ValueError(f"Unsupported statement format: {extension}")
+    return path
+
+def bulk_load(engine, dataset: SyntheticDataset, password_hash: str, batch_size: int = 50000) -> Dict[str, int]:
+    """Insert the dataset's users and transactions with batched Core INSERTs
+
+    Expects the schema and default categories to exist (init_db). Returns the
+    user id for each email.
+    """
+    from sqlalchemy import insert, select
+
+    from app.models.category import Category
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from app.utils.money import to_minor_units
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {**user, "hashed_password": password_hash, "is_active": True} for user in dataset.users()
+        ])
+        user_ids = dict(connection.execute(select(User.email, User.id)).all())
+        category_ids = dict(connection.execute(select(Category.name, Category.id)).all())
+
+    created_at = datetime(2025, 1, 1)
+    batch = []
+    for index, user in enumerate(dataset.users()):
+        user_id = user_ids[user["email"]]
+        for tx in dataset.transactions(index):
+            batch.append({
+                "user_id": user_id,
+                "transaction_date": tx["transaction_date"],
+                "amount_minor": to_minor_units(tx["amount"]),
+                "currency": "INR",
+                "description": tx["description"],
+                "merchant": tx["merchant"],
+                "is_expense": tx["is_expense"],
+                "category_id": category_ids.get(tx["category"]),
+                "source_file": "synthetic",
+                "created_at": created_at,
+            })
+            if len(batch) >= batch_size:
+                with engine.begin() as connection:
+                    connection.execute(insert(Transaction), batch)
+                batch = []
+    if batch:
+        with engine.begin() as connection:
+            connection.execute(insert(Transaction), batch)
+    return user_ids
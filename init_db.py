@@ -1,13 +1,10 @@
-from sqlalchemy import create_engine
 from app.models.user import User
 from app.models.category import Category
-from app.db.database import Base, SessionLocal
+from app.db.database import Base, SessionLocal, engine
 from app.utils.security import get_password_hash
-from app.core.config import settings
 
 def init_db():
     """Initialize the database with tables and default data"""
-    engine = create_engine(settings.DATABASE_URL)
     Base.metadata.create_all(bind=engine)
     
     # Create a session
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from app.db.database import engine, SessionLocal
+from app.utils.money import to_minor_units
 from sqlalchemy import text
 from datetime import datetime, timedelta
 import random
@@ -31,15 +32,15 @@ transactions = [
 for t in transactions:
     query = text('''
         INSERT INTO transactions 
-        (user_id, transaction_date, amount, description, merchant, is_expense, category_id, created_at) 
+        (user_id, transaction_date, amount_minor, currency, description, merchant, is_expense, category_id, created_at) 
         VALUES 
-        (:user_id, :date, :amount, :desc, :merchant, :is_expense, :cat_id, :created_at)
+        (:user_id, :date, :amount_minor, 'INR', :desc, :merchant, :is_expense, :cat_id, :created_at)
     ''')
 
     db.execute(query, {
         'user_id': user_id,
         'date': t['date'],
-        'amount': t['amount'],
+        'amount_minor': to_minor_units(t['amount'], 'INR'),
         'desc': t['desc'],
         'merchant': t['merchant'],
         'is_expense': t['is_expense'],
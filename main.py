@@ -1,9 +1,20 @@
+import logging
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import transactions, categories, reports, users
+from fastapi.responses import JSONResponse, Response
+from app.api.endpoints import transactions, categories, reports, users, profiles
 from app.core.config import settings
+from app.core import sql_profiler
+from app.core.request_profiler import RequestProfilerMiddleware
+from app.core.metrics import MetricsMiddleware, instrument_engine, mark_worker_dead, render_metrics
+from app.db.database import async_engine, async_read_engine, engine, log_database_settings, read_engine
+from app.services.ingest import ingest_coordinator
+from app.services.transaction_parser import preload_parsers
+from app.utils.security import PasswordHasherBusy
+
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(levelname)s:     %(name)s - %(message)s")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -20,11 +31,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency per route, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Time every SQL statement (in-memory databases read through the write engines)
+instrument_engine(engine, "write")
+instrument_engine(async_engine, "write")
+if read_engine is not engine:
+    instrument_engine(read_engine, "read")
+    instrument_engine(async_read_engine, "read")
+
+# Per-request SQL counts and timings (Server-Timing header, logs, N+1 warnings)
+if settings.SQL_PROFILING:
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware)
+    for db_engine in {engine, async_engine, read_engine, async_read_engine}:
+        sql_profiler.instrument_engine(db_engine)
+
+# Sampling profiler for requests sent with an X-Profile header (outermost, so it sees everything)
+app.add_middleware(RequestProfilerMiddleware)
+
 # Include routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
 app.include_router(categories.router, prefix="/api/categories", tags=["categories"])
 app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+if settings.DEBUG:
+    app.include_router(profiles.router, prefix="/api/debug/profiles", tags=["debug"])
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics for this worker, or all workers in multiprocess mode"""
+    content, content_type = render_metrics()
+    return Response(content=content, headers={"Content-Type": content_type})
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    # Shed login/registration load instead of queueing requests behind bcrypt
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.on_event("startup")
+def report_database_settings():
+    # Each worker logs its own effective connection profile
+    log_database_settings()
+
+@app.on_event("startup")
+def preload_upload_dependencies():
+    # Off by default so workers that never see an upload stay small
+    if settings.PRELOAD_PARSERS:
+        preload_parsers()
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    # Let queued imports commit before the engines go away
+    ingest_coordinator.stop()
+    mark_worker_dead()
+    # Pooled aiosqlite connections each own a thread that would keep the worker alive
+    await async_engine.dispose()
+    await async_read_engine.dispose()
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Move cold years of transactions into per-year archive tables.
+
+Report and list queries bounded by date only read the archive tables that
+overlap their range, so the hot `transactions` table stays small. Queries
+without a date bound still see every year.
+
+Usage:
+    python scripts/archive_transactions.py --keep-years 2
+    python scripts/archive_transactions.py --year 2016
+    python scripts/archive_transactions.py --restore 2016
+
+Archived rows are read-only through the API: they show up in listings,
+search, reports and GET /transactions/{id}, but not in edits or single
+deletes until restored. POST /transactions/bulk-delete does remove them, so
+deleting an import by source file takes its archived rows too. Each archive
+keeps a search index of its own.
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import delete, extract, func, insert, select
+
+from app.db.database import engine
+from app.db.partitions import archive_table, archive_table_name, archive_years
+from app.db.search_index import create_search_index, drop_search_index
+from app.models.transaction import Transaction
+
+def _year_range(column, year: int):
+    return (column >= datetime(year, 1, 1), column < datetime(year + 1, 1, 1))
+
+def archive_year(connection, year: int) -> int:
+    """Move one year of transactions into its archive table; returns rows moved"""
+    archive = archive_table(year)
+    archive.create(connection, checkfirst=True)
+    # Created first, so its triggers index the rows as they arrive
+    create_search_index(connection=connection, table=archive_table_name(year))
+    
+    columns = [column.name for column in Transaction.__table__.columns]
+    hot = Transaction.__table__
+    in_year = _year_range(hot.c.transaction_date, year)
+    
+    connection.execute(
+        insert(archive).from_select(columns, select(*[hot.c[name] for name in columns]).where(*in_year))
+    )
+    return connection.execute(delete(hot).where(*in_year)).rowcount
+
+def id_conflicts(connection, year: int) -> list:
+    """Ids of an archived year that a hot row has too (databases from before AUTOINCREMENT ids)"""
+    archive = archive_table(year)
+    hot = Transaction.__table__
+    return list(connection.execute(
+        select(archive.c.id).where(archive.c.id.in_(select(hot.c.id))).order_by(archive.c.id)
+    ).scalars())
+
+def restore_year(connection, year: int) -> int:
+    """Move an archived year back into the hot table and drop its archive
+
+    Raises ValueError, before moving anything, when archived ids clash with hot ones.
+    """
+    if year not in archive_years(connection):
+        return 0
+    
+    archive = archive_table(year)
+    conflicts = id_conflicts(connection, year)
+    if conflicts:
+        raise ValueError(
+            f"{len(conflicts)} archived id(s) are also used in transactions "
+            f"(e.g. {', '.join(map(str, conflicts[:5]))}); run scripts/migrate_transaction_ids.py "
+            "and resolve them before restoring"
+        )
+    
+    columns = [column.name for column in Transaction.__table__.columns]
+    connection.execute(
+        insert(Transaction.__table__).from_select(columns, select(*[archive.c[name] for name in columns]))
+    )
+    restored = connection.execute(select(func.count()).select_from(archive)).scalar()
+    drop_search_index(connection, archive_table_name(year))
+    archive.drop(connection)
+    return restored
+
+def hot_years(connection) -> list:
+    year = extract('year', Transaction.transaction_date)
+    return sorted(
+        int(row[0]) for row in connection.execute(select(year).group_by(year)) if row[0] is not None
+    )
+
+def years_to_archive(connection, args) -> list:
+    if args.keep_years is not None:
+        cutoff = datetime.now().year - args.keep_years + 1
+        return [year for year in hot_years(connection) if year < cutoff]
+    return args.year
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive or restore years of transactions")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--keep-years", type=int, help="Archive every year older than the last N calendar years")
+    group.add_argument("--year", type=int, action="append", help="Archive a specific year (repeatable)")
+    group.add_argument("--restore", type=int, action="append", help="Move an archived year back (repeatable)")
+    args = parser.parse_args()
+    
+    # One transaction, so readers see either the old or the new layout
+    failed = False
+    with engine.begin() as connection:
+        if args.restore:
+            for year in args.restore:
+                try:
+                    print(f"{year}: restored {restore_year(connection, year)} transactions")
+                except ValueError as e:
+                    print(f"{year}: not restored: {e}")
+                    failed = True
+        else:
+            years = years_to_archive(connection, args)
+            if not years:
+                print("Nothing to archive.")
+            for year in years:
+                print(f"{year}: archived {archive_year(connection, year)} transactions")
+    
+    # Years that could be restored are committed either way
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
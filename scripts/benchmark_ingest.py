@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark concurrent upload ingestion from several worker processes into one SQLite file.
+Each worker process runs a number of concurrent "uploads" (threads inserting a
+batch of rows each), either with every upload committing on its own, as the
+upload endpoint used to, or through the per-process IngestCoordinator, which
+coalesces batches and serializes writers across processes with a lock file.
+
+Usage: python scripts/benchmark_ingest.py [--workers 1 2 4] [--uploads 40]
+                                          [--rows 500] [--busy-timeout 5000]
+"""
+
+import sys
+import os
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def make_rows(worker: int, upload: int, rows: int):
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "user_id": 1,
+            "transaction_date": start + timedelta(minutes=i),
+            "amount_minor": 1000 + i,
+            "currency": "INR",
+            "description": f"UPI/P2M/{worker}-{upload}-{i}/Swiggy",
+            "merchant": "Swiggy",
+            "is_expense": True,
+            "source_file": f"w{worker}_u{upload}.csv",
+        }
+        for i in range(rows)
+    ]
+
+def run_worker(job):
+    """One uvicorn-like worker: `uploads` concurrent uploads of `rows` rows each"""
+    worker, mode, uploads, rows, concurrency = job
+    # Imported here so each process picks up the benchmark database from the environment
+    from sqlalchemy import insert
+    from app.db.database import engine
+    from app.models.transaction import Transaction
+    from app.services.ingest import IngestCoordinator, ingest_lock_path
+
+    coordinator = IngestCoordinator(lock_path=ingest_lock_path()) if mode == "coordinated" else None
+
+    def upload(i):
+        batch = make_rows(worker, i, rows)
+        try:
+            if coordinator is not None:
+                coordinator.submit(batch).result()
+            else:
+                with engine.begin() as connection:
+                    connection.execute(insert(Transaction), batch)
+            return None
+        except Exception as e:
+            return type(e).__name__
+
+    # Wall-clock bounds, so interpreter startup isn't counted against either mode
+    started = time.time()
+    with ThreadPoolExecutor(concurrency) as executor:
+        errors = [error for error in executor.map(upload, range(uploads)) if error]
+    finished = time.time()
+    commits = coordinator.commits if coordinator else uploads - len(errors)
+    if coordinator is not None:
+        coordinator.stop()
+    engine.dispose()
+    return errors, commits, started, finished
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--uploads", type=int, default=40, help="uploads per worker")
+    parser.add_argument("--rows", type=int, default=500, help="rows per upload")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent uploads per worker")
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="SQLITE_BUSY_TIMEOUT in ms")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'mode':12} {'workers':>7} {'rows/s':>10} {'commits':>8} {'failed':>7}")
+    for mode in ("direct", "coordinated"):
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as tmp:
+                os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'ingest.db')}"
+                os.environ["SQLITE_BUSY_TIMEOUT"] = str(args.busy_timeout)
+                os.environ["LOG_LEVEL"] = "WARNING"
+                from sqlalchemy import create_engine
+                from app.db.database import Base
+                from app.models import Transaction  # noqa: F401 - registers the tables
+                setup_engine = create_engine(os.environ["DATABASE_URL"])
+                Base.metadata.create_all(bind=setup_engine)
+                setup_engine.dispose()
+
+                jobs = [(w, mode, args.uploads, args.rows, args.concurrency) for w in range(workers)]
+                with context.Pool(workers) as pool:
+                    results = pool.map(run_worker, jobs)
+                elapsed = max(r[3] for r in results) - min(r[2] for r in results)
+
+                failed = sum(len(r[0]) for r in results)
+                commits = sum(r[1] for r in results)
+                inserted = (workers * args.uploads - failed) * args.rows
+                print(f"{mode:12} {workers:7} {inserted / elapsed:10,.0f} {commits:8} {failed:7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Benchmark login throughput with bcrypt running on the bounded hashing pool.
+Fires a burst of concurrent logins at the app in-process (no server needed)
+while another task keeps polling /api/users/me, and reports login throughput,
+how many logins were shed with 503, and /me latency during the burst.
+
+Users are created with --seed-rounds, so when that differs from BCRYPT_ROUNDS
+the run also exercises rehash-on-login.
+
+Usage: python scripts/benchmark_login.py [--logins 200] [--concurrency 50]
+                                         [--rounds 12] [--seed-rounds 10]
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)] if ordered else 0.0
+
+async def run(args):
+    # Imported here so the environment set in main() is what settings sees
+    import httpx
+    from passlib.context import CryptContext
+    from sqlalchemy import select
+
+    from app.db.database import Base, SessionLocal, async_engine, async_read_engine, engine
+    from app.models.user import User
+    from app.utils.security import pwd_context
+    from main import app
+
+    Base.metadata.create_all(bind=engine)
+    seed_context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=args.seed_rounds)
+    seed_hash = seed_context.hash("benchmark-password")
+    with SessionLocal() as db:
+        db.add_all([
+            User(email=f"user{i}@example.com", full_name=f"User {i}", hashed_password=seed_hash)
+            for i in range(args.users)
+        ])
+        db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        response = await client.post(
+            "/api/users/token",
+            data={"username": "user0@example.com", "password": "benchmark-password"},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        statuses = {}
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = asyncio.Event()
+
+        async def login(i):
+            async with semaphore:
+                response = await client.post(
+                    "/api/users/token",
+                    data={"username": f"user{i % args.users}@example.com", "password": "benchmark-password"},
+                )
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def poll_me():
+            timings = []
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/users/me", headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.01)
+            return timings
+
+        poller = asyncio.create_task(poll_me())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        me_timings = await poller
+
+    with SessionLocal() as db:
+        hashes = db.execute(select(User.hashed_password)).scalars().all()
+    rehashed = sum(1 for h in hashes if not pwd_context.needs_update(h))
+
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+
+    ok = statuses.get(200, 0)
+    print(f"bcrypt rounds={args.rounds} (seeded at {args.seed_rounds}), "
+          f"workers={os.environ['PASSWORD_HASH_WORKERS']}, queue_limit={os.environ['PASSWORD_HASH_QUEUE_LIMIT']}")
+    print(f"logins: {args.logins} in {elapsed:.2f}s -> {ok / elapsed:.1f} successful/s; statuses {dict(sorted(statuses.items()))}")
+    print(f"/me during burst: n={len(me_timings)} p50={statistics.median(me_timings):.2f}ms "
+          f"p95={percentile(me_timings, 0.95):.2f}ms max={max(me_timings):.2f}ms")
+    print(f"hashes at current cost: {rehashed}/{len(hashes)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--seed-rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+        if args.workers is not None:
+            os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+        if args.queue_limit is not None:
+            os.environ["PASSWORD_HASH_QUEUE_LIMIT"] = str(args.queue_limit)
+
+        from app.core.config import settings
+        os.environ.setdefault("PASSWORD_HASH_WORKERS", str(settings.PASSWORD_HASH_WORKERS))
+        os.environ.setdefault("PASSWORD_HASH_QUEUE_LIMIT", str(settings.PASSWORD_HASH_QUEUE_LIMIT))
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
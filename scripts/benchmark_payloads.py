@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Compare payload size and client parse time of the negotiated response encodings.
+Builds a page of synthetic transactions (10k rows by default) and encodes it
+the way the list/export endpoints do: row JSON, columnar JSON, and each of them
+gzipped.
+
+Usage: python scripts/benchmark_payloads.py [--rows 10000] [--repeat 10]
+"""
+
+import sys
+import os
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import Base
+from app.models import Transaction
+from app.utils.serialization import TRANSACTION_FIELDS, dump_json, to_columnar, transaction_columns, transaction_rows
+
+MERCHANTS = ["Swiggy", "Zomato", "Amazon Pay", "Flipkart", "Uber India", "Indian Oil", "BookMyShow", "DMart"]
+NOTES = ["UPI/P2M", "POS purchase", "NEFT transfer", "IMPS credit", "monthly bill"]
+
+def page_rows(rows: int):
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Transaction), [
+            {
+                "user_id": 1,
+                "transaction_date": start + timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                "amount_minor": rng.randint(1000, 500000),
+                "currency": "INR",
+                "description": f"{rng.choice(NOTES)}/{rng.randint(100000000, 999999999)}/{merchant}",
+                "merchant": merchant,
+                "is_expense": rng.random() < 0.85,
+                "category_id": rng.randint(1, 10),
+                "source_file": "statement_2023.csv",
+                "created_at": start,
+            }
+            for merchant in (rng.choice(MERCHANTS) for _ in range(rows))
+        ])
+    with Session(engine) as session:
+        result = session.execute(
+            select(*transaction_columns(Transaction)).order_by(Transaction.transaction_date.desc())
+        )
+        return transaction_rows(result)
+
+def parse_time(payload: bytes, compressed: bool, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        json.loads(gzip.decompress(payload) if compressed else payload)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = page_rows(args.rows)
+    row_json = dump_json(rows)
+    columnar_json = dump_json(to_columnar(rows, TRANSACTION_FIELDS))
+    encodings = [
+        ("json", row_json, False),
+        ("json+gzip", gzip.compress(row_json, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0), True),
+        ("columnar", columnar_json, False),
+        ("columnar+gzip", gzip.compress(columnar_json, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0), True),
+    ]
+
+    print(f"{args.rows:,}-row page, gzip level {settings.RESPONSE_GZIP_LEVEL}")
+    print(f"{'encoding':15} {'bytes':>12} {'vs json':>8} {'parse':>10}")
+    for name, payload, compressed in encodings:
+        print(
+            f"{name:15} {len(payload):12,} {len(payload) / len(row_json):8.1%} "
+            f"{parse_time(payload, compressed, args.repeat):8.1f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
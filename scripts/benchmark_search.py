@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Benchmark full-text transaction search latency on a large synthetic table.
+Builds a throwaway SQLite database (1M rows by default), then times the same
+query the /api/transactions/search endpoint runs for a mix of search terms.
+
+Usage: python scripts/benchmark_search.py [--rows 1000000] [--users 100]
+"""
+
+import sys
+import os
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.db.search_index import build_match_query, search_match
+from app.models import Transaction
+
+MERCHANTS = [
+    "Swiggy", "Zomato", "Big Bazaar", "Amazon Pay", "Flipkart", "Uber India",
+    "Ola Cabs", "Indian Oil", "BookMyShow", "Hotstar", "Airtel Recharge",
+    "Jio Prepaid", "Chai Point", "Barbeque Nation", "DMart", "Reliance Fresh",
+]
+NOTES = [
+    "UPI payment", "UPI/P2M", "POS purchase", "NEFT transfer", "IMPS credit",
+    "monthly bill", "food order", "grocery run", "cab ride", "movie tickets",
+]
+QUERIES = ["swig", "amazon", "upi p2m", "cab", "recharge", "barbeque nation", "groc", "neft"]
+
+def populate(engine, rows: int, users: int, batch_size: int = 50000):
+    """Bulk insert synthetic transactions; the sync triggers index them as they land"""
+    rng = random.Random(42)
+    start = datetime(2015, 1, 1)
+    inserted = 0
+    with engine.begin() as connection:
+        while inserted < rows:
+            batch = []
+            for _ in range(min(batch_size, rows - inserted)):
+                merchant = rng.choice(MERCHANTS)
+                batch.append({
+                    "user_id": rng.randint(1, users),
+                    "transaction_date": start + timedelta(minutes=rng.randint(0, 10 * 365 * 24 * 60)),
+                    "amount_minor": rng.randint(1000, 500000),
+                    "description": f"{rng.choice(NOTES)} {merchant} {rng.randint(100000, 999999)}",
+                    "merchant": merchant,
+                    "is_expense": rng.random() < 0.85,
+                    "category_id": rng.randint(1, 10),
+                    "source_file": "benchmark",
+                })
+            connection.execute(insert(Transaction), batch)
+            inserted += len(batch)
+
+def run_query(session: Session, user_id: int, q: str, limit: int = 100):
+    match = search_match(build_match_query(q))
+    return session.query(Transaction).join(
+        match, match.c.rowid == Transaction.id
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.is_expense == True
+    ).order_by(match.c.rank, Transaction.transaction_date.desc()).limit(limit).all()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        
+        started = time.perf_counter()
+        populate(engine, args.rows, args.users)
+        print(f"Loaded and indexed {args.rows:,} rows in {time.perf_counter() - started:.1f}s")
+        
+        rng = random.Random(7)
+        with Session(engine) as session:
+            for q in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    results = run_query(session, rng.randint(1, args.users), q)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    session.expunge_all()
+                timings.sort()
+                print(
+                    f"{q!r:20} p50={statistics.median(timings):7.2f}ms "
+                    f"p95={timings[int(len(timings) * 0.95) - 1]:7.2f}ms "
+                    f"last_hits={len(results)}"
+                )
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Benchmark per-row cost of serializing a transaction listing page.
+Compares the old path (hydrate ORM Transaction objects, then let FastAPI
+validate them through response_model and json.dumps the result) with the
+column-projection path the list endpoints now use (select plain columns,
+build dicts, serialize once through a precompiled TypeAdapter).
+
+Usage: python scripts/benchmark_serialization.py [--rows 10000] [--repeat 10]
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.models import Transaction
+from app.schemas.transaction import TransactionResponse
+from app.utils.serialization import dump_json, transaction_columns, transaction_rows
+
+def populate(engine, rows: int):
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(Transaction), [
+            {
+                "user_id": 1,
+                "transaction_date": start + timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                "amount_minor": rng.randint(1000, 500000),
+                "currency": "INR",
+                "description": f"UPI/P2M/{rng.randint(100000, 999999)}/Swiggy order",
+                "merchant": "Swiggy",
+                "is_expense": True,
+                "category_id": rng.randint(1, 10),
+                "source_file": "benchmark.csv",
+                "created_at": start,
+            }
+            for _ in range(rows)
+        ])
+
+def orm_path(engine, rows: int, field) -> bytes:
+    """What GET /api/transactions/ did before: ORM objects through response_model"""
+    with Session(engine) as session:
+        objects = session.scalars(
+            select(Transaction).order_by(Transaction.transaction_date.desc()).limit(rows)
+        ).all()
+        content = asyncio.run(serialize_response(field=field, response_content=objects))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def projection_path(engine, rows: int) -> bytes:
+    """Selected columns, dict rows, one TypeAdapter dump"""
+    with Session(engine) as session:
+        result = session.execute(
+            select(*transaction_columns(Transaction)).order_by(Transaction.transaction_date.desc()).limit(rows)
+        )
+        return dump_json(transaction_rows(result))
+
+def measure(label: str, fn, rows: int, repeat: int):
+    fn()  # warm up statement caches
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = fn()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    print(f"{label:12} {median * 1000:8.1f}ms/page  {median / rows * 1e6:6.2f}us/row  {len(payload):,} bytes")
+    return median
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.rows)
+    field = create_response_field(name="response", type_=List[TransactionResponse])
+
+    # Both paths must produce the same document
+    assert json.loads(orm_path(engine, args.rows, field)) == json.loads(projection_path(engine, args.rows))
+
+    print(f"Serializing a {args.rows:,}-row page (median of {args.repeat})")
+    before = measure("orm+model", lambda: orm_path(engine, args.rows, field), args.rows, args.repeat)
+    after = measure("projection", lambda: projection_path(engine, args.rows), args.rows, args.repeat)
+    print(f"speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Benchmark worker cold start time and resident memory.
+Each run starts a fresh interpreter the way a uvicorn worker does: import
+main, run the startup hooks, then report elapsed time and peak RSS. Runs
+with the default lazy imports and with PRELOAD_PARSERS=True (which is what
+every worker paid before pandas was imported lazily).
+
+Usage: python scripts/benchmark_startup.py [--runs 5]
+"""
+
+import sys
+import os
+import argparse
+import json
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs inside the child interpreter
+WORKER = """
+import asyncio, json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+ready = time.perf_counter()
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024  # bytes there, KiB on Linux
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "rss_mb": rss_kb / 1024,
+    "pandas": "pandas" in sys.modules,
+}))
+"""
+
+def run_worker(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", WORKER],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.db")
+        # The read-only pool can't open a database file that doesn't exist yet
+        sqlite3.connect(db_path).close()
+        base_env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "UPLOAD_DIR": os.path.join(tmp, "uploads"),
+            "LOG_LEVEL": "WARNING",
+        }
+
+        print(f"{'mode':10} {'import':>10} {'ready':>10} {'peak RSS':>10}  pandas loaded")
+        for mode, preload in (("lazy", "False"), ("preload", "True")):
+            results = [run_worker({**base_env, "PRELOAD_PARSERS": preload}) for _ in range(args.runs)]
+            print(
+                f"{mode:10} "
+                f"{statistics.median(r['import_ms'] for r in results):8.0f}ms "
+                f"{statistics.median(r['ready_ms'] for r in results):8.0f}ms "
+                f"{statistics.median(r['rss_mb'] for r in results):8.1f}MB  "
+                f"{results[-1]['pandas']}"
+            )
+
+if __name__ == "__main__":
+    main()
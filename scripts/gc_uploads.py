@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Reclaim stored uploads that nothing references any more.
+Drops uploads whose transactions have all been deleted once they are older
+than the retention period, then the blobs no upload points to, then their
+files (and leftovers of interrupted writes).
+
+Usage: python scripts/gc_uploads.py [--retention-days 30] [--dry-run]
+"""
+
+import sys
+import os
+import argparse
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.db.database import engine
+from app.services.ingest import ingest_lock_path, ingest_write_lock
+from app.services.upload_store import collect_garbage, sweep_blob_files
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--retention-days", type=int, default=settings.UPLOAD_RETENTION_DAYS)
+    parser.add_argument("--grace-seconds", type=int, default=settings.UPLOAD_GC_GRACE_SECONDS)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be reclaimed")
+    args = parser.parse_args()
+    
+    # Queue behind the app's writers instead of racing them for the write lock
+    with ingest_write_lock(ingest_lock_path()), engine.connect() as connection:
+        with connection.begin() as transaction:
+            stats = collect_garbage(connection, args.retention_days, args.grace_seconds)
+            if args.dry_run:
+                # The sweep sees the deletions, then they are rolled back
+                files = sweep_blob_files(connection, args.grace_seconds, dry_run=True)
+                transaction.rollback()
+        if not args.dry_run:
+            # Rows are committed first, so no kept row ever points at a deleted file
+            files = sweep_blob_files(connection, args.grace_seconds)
+    
+    verb = "Would reclaim" if args.dry_run else "Reclaimed"
+    print(
+        f"{verb} {stats['references']} upload(s), {stats['blobs']} blob(s) "
+        f"({stats['bytes'] / 1024:.1f} KiB) and {files} file(s)."
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Import a directory (or glob) of bank statements for one user.
+Files are parsed across a process pool and each one's rows go into the
+database through the ingest writer as soon as it is parsed. Files already
+imported with the current parser (same content hash, see import_manifests)
+are skipped, so an interrupted run picks up where it stopped.
+
+Usage: python scripts/import_statements.py --user EMAIL PATH [PATH ...]
+                                           [--bank-type chase] [--workers 4] [--force]
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import glob
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, async_engine
+from app.models.user import User
+from app.services.import_manifest import find_import, parse_with_cache, record_import
+from app.services.ingest import ingest_coordinator, transaction_insert_rows
+from app.services.transaction_parser import TransactionParser
+from app.services.upload_store import store_upload
+
+def find_statements(paths: list, recursive: bool) -> list:
+    """Statement files under the given directories, files and glob patterns, in a stable order"""
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                candidates = [os.path.join(d, name) for d, _, names in os.walk(path) for name in names]
+            else:
+                candidates = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            candidates = glob.glob(path, recursive=True)
+        for candidate in candidates:
+            extension = candidate.rsplit(".", 1)[-1].lower()
+            if os.path.isfile(candidate) and extension in settings.ALLOWED_EXTENSIONS:
+                found.add(os.path.abspath(candidate))
+    return sorted(found)
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file, read in chunks; the same as upload_store.content_hash of its bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def parse_statement(path: str, sha256: str, bank_type: str) -> list:
+    """Parse one file in a pool worker; the parse cache is shared with the upload endpoint"""
+    parser = TransactionParser()
+    with open(path, "rb") as f:
+        content = f.read()
+    transactions, _ = parse_with_cache(parser, content, parser.file_extension(path), sha256, bank_type)
+    # original_data is never stored; leaving it here saves pickling it back
+    return [{key: value for key, value in tx.items() if key != "original_data"} for tx in transactions]
+
+async def pending_statements(db, user_id: int, files: list, bank_type: str, force: bool) -> list:
+    """(path, sha256) of the files still to import; the rest were imported by an earlier run"""
+    pending, seen = [], set()
+    for path in files:
+        sha256 = file_hash(path)
+        if sha256 in seen or (not force and await find_import(db, user_id, sha256, bank_type)):
+            continue
+        seen.add(sha256)
+        pending.append((path, sha256))
+    return pending
+
+async def import_parsed(db, user_id: int, path: str, sha256: str, bank_type: str, transactions: list) -> tuple:
+    """Store the file and insert its rows; returns (rows inserted, rows in the file)"""
+    name = os.path.basename(path)
+    with open(path, "rb") as f:
+        upload = await store_upload(db, user_id, name, f.read(), sha256)
+    rows = transaction_insert_rows(user_id, transactions, name, upload.id)
+    inserted = await ingest_coordinator.ingest(rows)
+    # Recorded last: a file interrupted before this point is imported again,
+    # and whatever rows of it did make it in are skipped by their fingerprints
+    await record_import(db, user_id, sha256, bank_type, upload.id, inserted)
+    return inserted, len(rows)
+
+async def import_statements(args, db, user_id: int, files: list) -> dict:
+    totals = {"files": 0, "rows": 0, "duplicates": 0, "failed": 0}
+    pending = await pending_statements(db, user_id, files, args.bank_type, args.force)
+    totals["skipped"] = len(files) - len(pending)
+    print(f"{len(files)} statement(s) found, {totals['skipped']} already imported, {len(pending)} to import", flush=True)
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    queued = iter(pending)
+    in_flight = {}
+
+    # spawn: forked workers would inherit this process's database and writer threads
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        def submit_next():
+            for path, sha256 in queued:
+                in_flight[loop.run_in_executor(pool, parse_statement, path, sha256, args.bank_type)] = (path, sha256)
+                return
+
+        # Keep a few files parsed ahead of the writer, not the whole directory in memory
+        for _ in range(args.workers * 2):
+            submit_next()
+
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                path, sha256 = in_flight.pop(future)
+                submit_next()
+                progress = f"[{totals['files'] + totals['failed'] + 1}/{len(pending)}] {os.path.basename(path)}"
+                try:
+                    inserted, row_count = await import_parsed(
+                        db, user_id, path, sha256, args.bank_type, future.result()
+                    )
+                except Exception as e:
+                    # Not recorded, so the next run tries this file again
+                    await db.rollback()
+                    totals["failed"] += 1
+                    print(f"{progress}: failed: {e}", flush=True)
+                    continue
+                totals["files"] += 1
+                totals["rows"] += inserted
+                totals["duplicates"] += row_count - inserted
+                print(
+                    f"{progress}: {inserted} row(s), {row_count - inserted} already present "
+                    f"({time.perf_counter() - started:.1f}s)",
+                    flush=True,
+                )
+
+    totals["seconds"] = time.perf_counter() - started
+    return totals
+
+async def run(args, files: list) -> dict:
+    try:
+        async with AsyncSessionLocal() as db:
+            user = (await db.execute(select(User).where(User.email == args.user))).scalar_one_or_none()
+            if user is None:
+                raise SystemExit(f"No user with email {args.user}")
+            return await import_statements(args, db, user.id, files)
+    finally:
+        ingest_coordinator.stop()
+        # Pooled aiosqlite connections run on threads that would keep the process alive
+        await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="statement files, directories or glob patterns")
+    parser.add_argument("--user", required=True, help="email of the user to import for")
+    parser.add_argument("--bank-type", help="bank format of every file (default: detect per file)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    parser.add_argument("--recursive", action="store_true", help="descend into subdirectories")
+    parser.add_argument("--force", action="store_true", help="import files again even if already imported")
+    args = parser.parse_args()
+
+    files = find_statements(args.paths, args.recursive)
+    totals = asyncio.run(run(args, files))
+
+    print(
+        f"Imported {totals['rows']} transaction(s) from {totals['files']} file(s) in {totals['seconds']:.1f}s; "
+        f"{totals['duplicates']} row(s) already present, {totals['skipped']} file(s) skipped, "
+        f"{totals['failed']} failed."
+    )
+    if totals["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Migrate transactions from float amounts to integer minor units.
+Adds amount_minor and currency, converts each stored float amount exactly
+(via its shortest decimal repr, rounded half-up) and drops the old column.
+Safe to run more than once.
+"""
+
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.db.database import engine
+from app.utils.money import to_minor_units
+
+BATCH_SIZE = 10000
+
+def table_columns(connection, table: str) -> set:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def migrate(connection) -> int:
+    """Convert transactions.amount to amount_minor; returns the number of rows converted"""
+    columns = table_columns(connection, "transactions")
+    if "amount_minor" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE transactions ADD COLUMN amount_minor BIGINT NOT NULL DEFAULT 0"
+        )
+    if "currency" not in columns:
+        connection.exec_driver_sql(
+            f"ALTER TABLE transactions ADD COLUMN currency VARCHAR(3) NOT NULL DEFAULT '{settings.DEFAULT_CURRENCY}'"
+        )
+    if "amount" not in columns:
+        return 0
+
+    converted = 0
+    last_id = 0
+    while True:
+        rows = connection.exec_driver_sql(
+            "SELECT id, amount, currency FROM transactions WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.exec_driver_sql(
+            "UPDATE transactions SET amount_minor = ? WHERE id = ?",
+            [(to_minor_units(amount or 0, currency), tx_id) for tx_id, amount, currency in rows]
+        )
+        converted += len(rows)
+        last_id = rows[-1][0]
+
+    connection.exec_driver_sql("ALTER TABLE transactions DROP COLUMN amount")
+    return converted
+
+def main():
+    with engine.begin() as connection:
+        converted = migrate(connection)
+    
+    print(f"Converted {converted} transaction amounts to minor units.")
+
+if __name__ == "__main__":
+    main()
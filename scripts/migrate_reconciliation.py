@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Add transactions.reconciled_with_id, which links a payment imported from a
+second statement (e.g. PhonePe next to the bank) to the row it duplicates,
+and transactions.statement_source, the kind of statement a row came from.
+Rows imported before it stay NULL and are only matched by UTR.
+Archive tables get the columns too. Safe to run more than once.
+"""
+
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import engine
+from app.db.partitions import archive_table_name, archive_years
+
+def table_columns(connection, table: str) -> set:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+COLUMNS = {
+    "reconciled_with_id": "INTEGER REFERENCES transactions (id)",
+    "statement_source": "VARCHAR",
+}
+
+def migrate(connection) -> list:
+    """Add the reconciliation columns wherever they are missing; returns the tables altered"""
+    altered = []
+    tables = ["transactions"] + [archive_table_name(year) for year in archive_years(connection)]
+    for table in tables:
+        missing = [name for name in COLUMNS if name not in table_columns(connection, table)]
+        for name in missing:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {COLUMNS[name]}")
+        if missing:
+            altered.append(table)
+    return altered
+
+def main():
+    with engine.begin() as connection:
+        altered = migrate(connection)
+    
+    print(f"Added reconciliation columns to {len(altered)} table(s).")
+
+if __name__ == "__main__":
+    main()
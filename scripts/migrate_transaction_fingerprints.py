@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Add import fingerprints to transactions.
+Adds transactions.fingerprint (to archive tables too), fills it in for
+imported transactions and creates the unique (user_id, fingerprint) index
+that lets imports skip rows a user already has. Rows that already duplicate
+an earlier import are reported and left without a fingerprint, never deleted.
+Safe to run more than once.
+"""
+
+import sys
+import os
+from collections import Counter, defaultdict
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+
+from app.db.database import engine
+from app.db.partitions import archive_table_name, archive_years
+from app.models.transaction import Transaction
+from app.services.ingest import occurrence_key, transaction_fingerprint
+
+INDEX_NAME = "uq_transactions_user_fingerprint"
+BATCH_SIZE = 10000
+
+def table_columns(connection, table: str) -> set:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def backfill(connection) -> tuple:
+    """Fingerprint imported transactions statement by statement; returns (filled, duplicates)"""
+    # Occurrence numbers count within a statement, as they do at import time.
+    # Rows imported before uploads were recorded are told apart by file name
+    # and import time.
+    statement = (Transaction.upload_id, Transaction.source_file, Transaction.created_at)
+    rows = connection.execution_options(yield_per=BATCH_SIZE).execute(
+        select(
+            Transaction.id, Transaction.user_id, *statement, Transaction.transaction_date,
+            Transaction.amount_minor, Transaction.currency, Transaction.description,
+        )
+        .where(Transaction.source_file.is_not(None))
+        .order_by(Transaction.user_id, Transaction.id)
+    )
+    
+    # In id order, so of two overlapping imports the earlier one keeps its fingerprints
+    seen, occurrences = set(), defaultdict(Counter)
+    current_user = None
+    updates, filled, duplicates = [], 0, 0
+    for tx_id, user_id, upload_id, source_file, created_at, transaction_date, amount_minor, currency, description in rows:
+        if user_id != current_user:
+            seen.clear()
+            occurrences.clear()
+            current_user = user_id
+        source = occurrences[upload_id if upload_id is not None else (source_file, created_at)]
+        key = occurrence_key(transaction_date, amount_minor, currency, description)
+        fingerprint = transaction_fingerprint(None, key, source[key])
+        source[key] += 1
+        if fingerprint in seen:
+            duplicates += 1
+            continue
+        seen.add(fingerprint)
+        updates.append((fingerprint, tx_id))
+        if len(updates) >= BATCH_SIZE:
+            filled += _write(connection, updates)
+    filled += _write(connection, updates)
+    return filled, duplicates
+
+def _write(connection, updates: list) -> int:
+    if updates:
+        connection.exec_driver_sql("UPDATE transactions SET fingerprint = ? WHERE id = ?", updates)
+    count = len(updates)
+    updates.clear()
+    return count
+
+def main():
+    with engine.begin() as connection:
+        tables = ["transactions"] + [archive_table_name(year) for year in archive_years(connection)]
+        for table in tables:
+            if "fingerprint" not in table_columns(connection, table):
+                connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN fingerprint VARCHAR(64)")
+        
+        indexed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (INDEX_NAME,)
+        ).first()
+        if indexed:
+            print("Fingerprints already in place.")
+            return
+        
+        filled, duplicates = backfill(connection)
+        connection.exec_driver_sql(
+            f"CREATE UNIQUE INDEX {INDEX_NAME} ON transactions (user_id, fingerprint)"
+        )
+    
+    print(f"Fingerprinted {filled} imported transactions.")
+    if duplicates:
+        print(f"{duplicates} transactions duplicate an earlier import of the same rows; "
+              "they were left without a fingerprint.")
+
+if __name__ == "__main__":
+    main()
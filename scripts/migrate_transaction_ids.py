@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Rebuild the transactions table with AUTOINCREMENT ids.
+Without it SQLite hands the ids of rows moved to an archive table to new
+imports, so archived and hot rows end up sharing ids. The table is copied
+as is (ids included) and the id sequence starts above every id in use,
+archives included. Safe to run more than once.
+"""
+
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.schema import CreateTable
+
+from app.db.database import engine
+from app.db.partitions import archive_table_name, archive_years
+from app.db.search_index import create_search_index
+from app.models.transaction import Transaction
+
+def table_columns(connection, table: str) -> set:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def highest_id(connection) -> int:
+    """The largest transaction id in the hot table or any archive"""
+    tables = ["transactions"] + [archive_table_name(year) for year in archive_years(connection)]
+    return max(connection.exec_driver_sql(f"SELECT coalesce(max(id), 0) FROM {table}").scalar() for table in tables)
+
+def migrate(connection) -> bool:
+    """Rebuild transactions with AUTOINCREMENT unless it has it already; returns whether it did"""
+    table_sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transactions'"
+    ).scalar()
+    if table_sql is None or "AUTOINCREMENT" in table_sql.upper():
+        return False
+
+    # Dropping the old table drops its indexes and search triggers; the FTS
+    # index itself is keyed by id, which the copy keeps, so it stays valid
+    ddl = str(CreateTable(Transaction.__table__).compile(connection))
+    connection.exec_driver_sql(ddl.replace("CREATE TABLE transactions ", "CREATE TABLE transactions_new ", 1))
+    columns = ", ".join(
+        column.name for column in Transaction.__table__.columns
+        if column.name in table_columns(connection, "transactions")
+    )
+    connection.exec_driver_sql(f"INSERT INTO transactions_new ({columns}) SELECT {columns} FROM transactions")
+    connection.exec_driver_sql("DROP TABLE transactions")
+    connection.exec_driver_sql("ALTER TABLE transactions_new RENAME TO transactions")
+    for index in Transaction.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    create_search_index(connection=connection)
+
+    connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name IN ('transactions', 'transactions_new')")
+    connection.exec_driver_sql(
+        "INSERT INTO sqlite_sequence (name, seq) VALUES ('transactions', ?)", (highest_id(connection),)
+    )
+    return True
+
+def main():
+    with engine.begin() as connection:
+        rebuilt = migrate(connection)
+
+    print("Rebuilt transactions with AUTOINCREMENT ids." if rebuilt else "transactions already uses AUTOINCREMENT ids.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Migrate to content-addressed upload storage.
+Creates the upload_blobs, upload_references and import_manifests tables
+and adds transactions.upload_id (to archive tables too). Uploads saved by older
+versions under app/static/uploads were publicly served and are linked to
+nothing; pass --delete-legacy to remove them. Safe to run more than once.
+"""
+
+import sys
+import os
+import argparse
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import engine
+from app.db.partitions import archive_table_name, archive_years
+from app.models.upload import ImportManifest, UploadBlob, UploadReference
+
+LEGACY_UPLOAD_DIR = os.path.join("app", "static", "uploads")
+
+def table_columns(connection, table: str) -> set:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def migrate(connection) -> list:
+    """Create the upload tables and add upload_id; returns the tables altered"""
+    UploadBlob.__table__.create(connection, checkfirst=True)
+    UploadReference.__table__.create(connection, checkfirst=True)
+    ImportManifest.__table__.create(connection, checkfirst=True)
+    
+    altered = []
+    tables = ["transactions"] + [archive_table_name(year) for year in archive_years(connection)]
+    for table in tables:
+        if "upload_id" not in table_columns(connection, table):
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table} ADD COLUMN upload_id INTEGER REFERENCES upload_references (id)"
+            )
+            altered.append(table)
+    # Duplicate-upload checks and garbage collection look transactions up by upload
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_upload_id ON transactions (upload_id)")
+    return altered
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate to content-addressed upload storage")
+    parser.add_argument("--delete-legacy", action="store_true", help=f"delete files left in {LEGACY_UPLOAD_DIR}")
+    args = parser.parse_args()
+    
+    with engine.begin() as connection:
+        altered = migrate(connection)
+    print(f"Added upload_id to {len(altered)} table(s).")
+    
+    legacy = os.listdir(LEGACY_UPLOAD_DIR) if os.path.isdir(LEGACY_UPLOAD_DIR) else []
+    if legacy and args.delete_legacy:
+        for name in legacy:
+            os.remove(os.path.join(LEGACY_UPLOAD_DIR, name))
+        print(f"Deleted {len(legacy)} legacy upload(s) from {LEGACY_UPLOAD_DIR}.")
+    elif legacy:
+        print(f"{len(legacy)} legacy upload(s) remain publicly served from {LEGACY_UPLOAD_DIR}; "
+              "rerun with --delete-legacy to remove them.")
+
+if __name__ == "__main__":
+    main()
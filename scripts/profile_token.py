@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+"""
+Print a signed token for profiling requests on a deployment without DEBUG.
+Send it as the X-Profile header; the response's X-Profile-Id names the saved
+profile under PROFILE_DIR.
+
+Usage: python scripts/profile_token.py [--minutes 15]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.request_profiler import create_profile_token
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=15, help="how long the token stays valid")
+    args = parser.parse_args()
+    
+    print(create_profile_token(args.minutes))
+
+if __name__ == "__main__":
+    main()
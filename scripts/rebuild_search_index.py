@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+"""
+Script to create and rebuild the full-text search indexes over transactions
+and every archive table. Run this once on databases created before search was
+added or with years archived before archives were searchable, or whenever an
+index is suspected to be out of sync with its table.
+"""
+
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import engine
+from app.db.partitions import partition_tables
+from app.db.search_index import rebuild_search_index
+
+def main():
+    with engine.begin() as connection:
+        indexed = {table: rebuild_search_index(connection, table) for table in partition_tables(connection)}
+    
+    for table, count in indexed.items():
+        print(f"Search index for {table} rebuilt with {count} transactions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Category listing against a scratch SQLite database"""
+
+import os
+import tempfile
+
+# Settings are read at import time, so point them at a scratch database first
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp, "uploads")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db.database import SessionLocal, engine, read_engine
+from app.models.category import Category
+from app.models.category_keyword import CategoryKeyword
+from app.models.user import User
+from init_db import init_db
+from main import app
+
+@pytest.fixture(scope="module")
+def client():
+    init_db()
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/users/token", data={"username": "admin@example.com", "password": "adminpassword"}
+        )
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield client
+
+def add_categories(count: int, keywords_each: int = 3):
+    """Give the admin user `count` more top-level categories, each with a few keywords"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "admin@example.com").one()
+        offset = db.query(Category).count()
+        for i in range(offset, offset + count):
+            category = Category(name=f"Category {i}", user_id=user.id)
+            category.keywords = [CategoryKeyword(keyword=f"kw{i}-{k}") for k in range(keywords_each)]
+            db.add(category)
+        db.commit()
+    finally:
+        db.close()
+
+def count_statements(client, url: str) -> int:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = {engine, read_engine}
+    for eng in engines:
+        event.listen(eng, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+    finally:
+        for eng in engines:
+            event.remove(eng, "before_cursor_execute", record)
+    assert response.status_code == 200
+    return len(statements)
+
+def test_category_listing_query_count_is_constant(client):
+    # Warm up so the user lookup is cached the same way for both measured calls
+    client.get("/api/categories/")
+
+    add_categories(10)
+    listed = client.get("/api/categories/").json()
+    assert sum(len(c["keywords"]) for c in listed) >= 30
+    with_n = count_statements(client, "/api/categories/")
+
+    add_categories(10)
+    assert len(client.get("/api/categories/").json()) == len(listed) + 10
+    with_2n = count_statements(client, "/api/categories/")
+
+    assert with_n == with_2n
+    assert with_n > 0
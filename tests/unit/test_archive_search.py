@@ -0,0 +1,43 @@
+"""Archived years stay searchable, through an index per archive table"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.db.database import Base
+from app.db.partitions import partition_tables, transaction_source
+from app.db.search_index import build_match_query, search_match
+from app.models import Transaction, User
+from scripts.archive_transactions import archive_year, restore_year
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": 1, "email": "a@example.com", "hashed_password": "x"}])
+        connection.execute(insert(Transaction), [
+            {"user_id": 1, "transaction_date": datetime(2020, 5, 1), "amount_minor": 100, "description": "Swiggy 2020"},
+            {"user_id": 1, "transaction_date": datetime(2024, 5, 1), "amount_minor": 100, "description": "Swiggy 2024"},
+        ])
+        yield connection
+
+def search(connection, q: str, start_date=None, end_date=None) -> list:
+    source = transaction_source(connection, start_date, end_date)
+    match = search_match(build_match_query(q), partition_tables(connection, start_date, end_date))
+    query = select(source.description).join(match, match.c.rowid == source.id).order_by(source.description)
+    return list(connection.execute(query).scalars())
+
+def test_archived_rows_are_found_by_unbounded_search(connection):
+    archive_year(connection, 2020)
+
+    assert search(connection, "swiggy") == ["Swiggy 2020", "Swiggy 2024"]
+    assert search(connection, "swiggy", start_date="2024-01-01") == ["Swiggy 2024"]
+
+def test_restored_rows_move_back_to_the_hot_index(connection):
+    archive_year(connection, 2020)
+    restore_year(connection, 2020)
+
+    assert partition_tables(connection) == ["transactions"]
+    assert search(connection, "swiggy") == ["Swiggy 2020", "Swiggy 2024"]
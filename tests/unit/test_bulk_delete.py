@@ -0,0 +1,48 @@
+"""Bulk delete by source file removes the import from archived years too"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.api.endpoints.transactions import bulk_delete_transactions
+from app.db.database import Base
+from app.db.partitions import transaction_source
+from app.models import Transaction, User
+from app.schemas.transaction import BulkTransactionDelete
+from scripts.archive_transactions import archive_year
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(User), [{"id": 1, "email": "a@example.com", "hashed_password": "x"}])
+        db.execute(insert(Transaction), [
+            {"user_id": 1, "transaction_date": datetime(year, 12, 30), "amount_minor": 100,
+             "description": f"Row {year}", "source_file": source_file}
+            for year in (2023, 2024) for source_file in ("jan.csv", "other.csv")
+        ])
+        archive_year(db.connection(), 2023)
+        db.commit()
+        yield db
+
+def remaining(db) -> list:
+    source = transaction_source(db)
+    return sorted(db.execute(select(source.source_file, source.description)).all())
+
+def test_deleting_an_import_removes_its_archived_rows(db):
+    result = bulk_delete_transactions(BulkTransactionDelete(source_file="jan.csv"), SimpleNamespace(id=1), db)
+
+    assert result == {"affected": 2}
+    assert remaining(db) == [("other.csv", "Row 2023"), ("other.csv", "Row 2024")]
+
+def test_deleting_by_id_reaches_archived_rows(db):
+    source = transaction_source(db)
+    archived_id = db.execute(select(func.min(source.id)).where(source.description == "Row 2023")).scalar()
+    result = bulk_delete_transactions(BulkTransactionDelete(transaction_ids=[archived_id]), SimpleNamespace(id=1), db)
+
+    assert result == {"affected": 1}
+    assert len(remaining(db)) == 3
@@ -0,0 +1,29 @@
+"""PDF statement records mapped to the standard transaction dict"""
+
+from decimal import Decimal
+
+from app.services.transaction_parser import TransactionParser
+
+PHONEPE_RECORD = {
+    "date": "2025-04-02", "time": "04:12 PM", "description": "Paid to Owner Defence Colony",
+    "amount": -43500.0, "type": "DEBIT", "transaction_id": "T2504021612345803303283",
+    "utr_no": "516730949534", "account": "XXXXXX4833", "category": "housing", "source": "PhonePe",
+}
+
+def test_debit_becomes_an_expense_keyed_by_its_utr():
+    [tx] = TransactionParser()._map_pdf_records([PHONEPE_RECORD], "PhonePe", {})
+
+    assert tx["amount"] == Decimal("43500")
+    assert tx["is_expense"] is True
+    assert tx["merchant"] == "Owner Defence Colony"
+    assert tx["transaction_id"] == "516730949534"
+    assert tx["statement_source"] == "pdf:phonepe"
+
+def test_wallet_payment_without_utr_keeps_the_app_transaction_id():
+    record = {**PHONEPE_RECORD, "description": "Received from A Friend", "amount": 250.0, "utr_no": ""}
+    [tx] = TransactionParser()._map_pdf_records([record], "PhonePe", {})
+
+    assert tx["is_expense"] is False
+    assert tx["amount"] == Decimal("-250")
+    assert tx["merchant"] == "A Friend"
+    assert tx["transaction_id"] == "T2504021612345803303283"
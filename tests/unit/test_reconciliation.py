@@ -0,0 +1,34 @@
+"""Reconciliation pairs a payment across statement kinds, never across uploads of one kind"""
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from app.db.database import Base
+from app.models import Transaction, User
+from app.services.ingest import transaction_insert_rows
+from app.services.reconciliation import reconcile_user
+from app.services.transaction_parser import TransactionParser
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": 1, "email": "a@example.com", "hashed_password": "x"}])
+        yield connection
+
+def import_statement(connection, upload_id: int, csv: str):
+    parsed = TransactionParser().parse_content(csv.encode(), "csv")
+    connection.execute(insert(Transaction), transaction_insert_rows(1, parsed, f"{upload_id}.csv", upload_id))
+
+def test_two_statements_of_one_bank_are_not_paired(connection):
+    import_statement(connection, 1, "date,amount,description\n2024-01-30,500,Swiggy order\n")
+    import_statement(connection, 2, "date,amount,description\n2024-02-01,500,Swiggy food order 2\n")
+
+    assert reconcile_user(connection, 1) == {"matched_by_utr": 0, "matched_by_amount": 0}
+
+def test_bank_and_upi_app_rows_of_one_payment_are_paired(connection):
+    import_statement(connection, 1, "date,amount,description\n2024-01-30,500,UPI/SWIGGY\n")
+    import_statement(connection, 2, "Date,Amount,Details\n2024-01-31,500,Paid to Swiggy\n")
+
+    assert reconcile_user(connection, 1) == {"matched_by_utr": 0, "matched_by_amount": 1}
@@ -1,7 +1,11 @@
 import csv
 import os
 import sys
-from parser_analyser import extract_phonepe_descriptions
+
+# The parser now lives in the app (app/services/pdf_parser.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.pdf_parser import extract_phonepe_descriptions
 
 def main():
     """
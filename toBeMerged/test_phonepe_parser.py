@@ -1,5 +1,10 @@
 import os
-from parser_analyser import ExpenseParser
+import sys
+
+# The parser now lives in the app (app/services/pdf_parser.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.pdf_parser import ExpenseParser
 
 def test_phonepe_parser(pdf_path):
     """